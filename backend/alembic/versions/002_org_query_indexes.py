@@ -0,0 +1,46 @@
+"""composite indexes for organization queries
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Member list ordered by join date, and the "another admin left?" check
+    op.create_index('idx_org_members_org_created', 'organization_members', ['organization_id', 'created_at'])
+    op.create_index(
+        'idx_org_members_org_admins', 'organization_members', ['organization_id'],
+        postgresql_where=sa.text("role = 'admin'"),
+    )
+    # Pending invites per organization
+    op.create_index(
+        'idx_org_invites_org_pending', 'organization_invites', ['organization_id'],
+        postgresql_where=sa.text('accepted_at IS NULL'),
+    )
+    # Org trip list (newest first) and per-designer trip counts; the first
+    # also covers plain organization_id lookups, so the old index goes.
+    op.create_index('idx_trips_org_created', 'trips', ['organization_id', sa.text('created_at DESC')])
+    op.create_index('idx_trips_org_user', 'trips', ['organization_id', 'user_id'])
+    op.drop_index('idx_trips_organization_id', table_name='trips')
+
+
+def downgrade() -> None:
+    op.create_index('idx_trips_organization_id', 'trips', ['organization_id'])
+    op.drop_index('idx_trips_org_user', table_name='trips')
+    op.drop_index('idx_trips_org_created', table_name='trips')
+    op.drop_index('idx_org_invites_org_pending', table_name='organization_invites')
+    op.drop_index('idx_org_members_org_admins', table_name='organization_members')
+    op.drop_index('idx_org_members_org_created', table_name='organization_members')
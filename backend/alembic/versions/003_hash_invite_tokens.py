@@ -0,0 +1,38 @@
+"""store organization invite tokens as SHA-256 hashes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('organization_invites', sa.Column('token_hash', sa.String(128), nullable=True))
+    # Same digest as app.token_utils.hash_token, so pending invite links keep working
+    op.execute("UPDATE organization_invites SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex')")
+    op.alter_column('organization_invites', 'token_hash', nullable=False)
+    op.create_unique_constraint('organization_invites_token_hash_key', 'organization_invites', ['token_hash'])
+    # Also drops the unique constraint and idx_org_invites_token on the column
+    op.drop_column('organization_invites', 'token')
+
+
+def downgrade() -> None:
+    # Raw tokens cannot be recovered; pending invites will need to be re-sent.
+    op.add_column('organization_invites', sa.Column('token', sa.String(64), nullable=True))
+    op.execute("UPDATE organization_invites SET token = left(token_hash, 64)")
+    op.alter_column('organization_invites', 'token', nullable=False)
+    op.create_unique_constraint('organization_invites_token_key', 'organization_invites', ['token'])
+    op.create_index('idx_org_invites_token', 'organization_invites', ['token'])
+    op.drop_column('organization_invites', 'token_hash')
@@ -0,0 +1,32 @@
+"""functional index on lower(users.email)
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Built concurrently so signups and logins are not blocked on a large table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_users_email_lower', 'users', [sa.text('lower(email)')],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_users_email_lower', table_name='users', postgresql_concurrently=True)
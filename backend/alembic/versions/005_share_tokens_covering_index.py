@@ -0,0 +1,35 @@
+"""covering index for share token lookups
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The unique constraint keeps enforcing uniqueness; this index answers the
+    # public /shared/{token} check (trip and expiry) with an index-only scan.
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_share_tokens_token', table_name='share_tokens', postgresql_concurrently=True)
+        op.create_index(
+            'idx_share_tokens_token', 'share_tokens', ['token'],
+            postgresql_include=['trip_id', 'expires_at'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_share_tokens_token', table_name='share_tokens', postgresql_concurrently=True)
+        op.create_index('idx_share_tokens_token', 'share_tokens', ['token'], postgresql_concurrently=True)
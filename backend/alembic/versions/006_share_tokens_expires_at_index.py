@@ -0,0 +1,31 @@
+"""index share_tokens.expires_at
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # create_share_token sweeps expired tokens on every call
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_share_tokens_expires_at', 'share_tokens', ['expires_at'],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_share_tokens_expires_at', table_name='share_tokens', postgresql_concurrently=True)
@@ -0,0 +1,37 @@
+"""drop FK indexes covered by the sort_index unique constraints
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table, column): each column leads a (column, sort_index) unique
+# constraint whose index already serves lookups and ordered scans by it.
+REDUNDANT_INDEXES = [
+    ('idx_trip_stops_trip_id', 'trip_stops', 'trip_id'),
+    ('idx_activities_trip_stop_id', 'activities', 'trip_stop_id'),
+    ('idx_activity_photos_activity_id', 'activity_photos', 'activity_id'),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, column in REDUNDANT_INDEXES:
+            op.create_index(name, table, [column], postgresql_concurrently=True)
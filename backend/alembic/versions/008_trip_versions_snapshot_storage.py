@@ -0,0 +1,28 @@
+"""store trip_versions.snapshot_data uncompressed out of line
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Snapshots are read whole on detail and restore; EXTERNAL keeps them in
+    # TOAST without pglz compression so those reads skip decompression.
+    # Catalog-only change: existing values keep their storage until rewritten.
+    op.execute("ALTER TABLE trip_versions ALTER COLUMN snapshot_data SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE trip_versions ALTER COLUMN snapshot_data SET STORAGE EXTENDED")
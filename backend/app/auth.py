@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
@@ -7,12 +8,18 @@ from fastapi import Cookie, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.cache import TTLCache
 from app.config import settings
 from app.database import get_db
 from app.models import User
 
 ALGORITHM = "HS256"
 
+# Verified access tokens -> user id, so repeat requests skip the signature check.
+# Entries never outlive the token's own exp claim.
+ACCESS_TOKEN_CACHE_TTL = 60
+_access_token_cache = TTLCache(maxsize=10_000, ttl=ACCESS_TOKEN_CACHE_TTL)
+
 
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
@@ -22,6 +29,16 @@ def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed.encode())
 
 
+# bcrypt is deliberately slow (~100ms+); run it in a worker thread so request
+# handlers do not stall the event loop. bcrypt releases the GIL while hashing.
+async def hash_password_async(password: str) -> str:
+    return await asyncio.to_thread(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await asyncio.to_thread(verify_password, password, hashed)
+
+
 def create_access_token(user_id: str) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {"sub": user_id, "exp": expire, "type": "access"}
@@ -43,12 +60,11 @@ def decode_token(token: str) -> dict:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
-async def get_current_user(
-    access_token: str | None = Cookie(default=None),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    if not access_token:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+def access_token_user_id(access_token: str) -> str:
+    """Verify an access token and return its user id, raising 401 if invalid."""
+    user_id = _access_token_cache.get(access_token)
+    if user_id is not None:
+        return user_id
 
     payload = decode_token(access_token)
     if payload.get("type") != "access":
@@ -58,6 +74,20 @@ async def get_current_user(
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    remaining = payload["exp"] - datetime.now(timezone.utc).timestamp()
+    _access_token_cache.set(access_token, user_id, ttl=min(remaining, ACCESS_TOKEN_CACHE_TTL))
+    return user_id
+
+
+async def get_current_user(
+    access_token: str | None = Cookie(default=None),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    if not access_token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    user_id = access_token_user_id(access_token)
+
     user = await db.get(User, UUID(user_id))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
@@ -22,6 +22,12 @@ class Settings(BaseSettings):
     RESEND_API_KEY: str = ""
     RESEND_FROM_EMAIL: str = "onboarding@resend.dev"
     FRONTEND_URL: str = "http://localhost:5173"
+    # Log per-request SQL query counts (dev only) and warn above the threshold
+    DB_QUERY_LOG_ENABLED: bool = False
+    DB_QUERY_WARN_THRESHOLD: int = 10
+    # Storage for rate-limit counters (a `limits` URI). Set it to Redis, e.g.
+    # redis://redis:6379/0 (needs the redis package), to share counters between workers
+    RATE_LIMIT_STORAGE_URI: str = "memory://"
 
     model_config = {"env_file": ".env"}
 
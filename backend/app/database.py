@@ -1,8 +1,28 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+
+def json_serializer(value) -> str:
+    """Encode JSON/JSONB parameters with orjson (asyncpg's codec expects str)."""
+    return orjson.dumps(value).decode()
+
+
+# orjson instead of the stdlib json module for JSONB columns (version snapshots)
+json_deserializer = orjson.loads
+
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=False,
+    json_serializer=json_serializer,
+    json_deserializer=json_deserializer,
+)
 
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
@@ -25,3 +45,36 @@ async def create_tables():
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+class QueryCount:
+    """Number of SQL statements executed while tracking is active."""
+
+    def __init__(self):
+        self.count = 0
+
+
+_current_query_count: ContextVar[QueryCount | None] = ContextVar("current_query_count", default=None)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    query_count = _current_query_count.get()
+    if query_count is not None:
+        query_count.count += 1
+
+
+def enable_query_counting() -> None:
+    """Count statements on every engine so track_queries() can report them."""
+    if not event.contains(Engine, "before_cursor_execute", _count_query):
+        event.listen(Engine, "before_cursor_execute", _count_query)
+
+
+@contextmanager
+def track_queries():
+    """Count the statements executed in the current context (e.g. one request)."""
+    query_count = QueryCount()
+    token = _current_query_count.set(query_count)
+    try:
+        yield query_count
+    finally:
+        _current_query_count.reset(token)
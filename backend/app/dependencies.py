@@ -1,18 +1,78 @@
 import os
+from itertools import groupby
+from operator import attrgetter
 from uuid import UUID
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from sqlalchemy import select
+from sqlalchemy import exists, lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, raiseload
 
+from .auth import access_token_user_id
+from .cache import TTLCache
+from .config import settings
 from .models import Activity, Movement, Trip, TripStop, User
 
 TESTING = os.environ.get("TESTING", "").lower() == "true"
 
-limiter = Limiter(key_func=get_remote_address, enabled=not TESTING)
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    strategy="moving-window",
+    enabled=not TESTING,
+)
+
+
+def user_or_ip_key(request: Request) -> str:
+    """Rate-limit key for authenticated endpoints: one bucket per user, not per IP."""
+    access_token = request.cookies.get("access_token")
+    if access_token:
+        try:
+            return f"user:{access_token_user_id(access_token)}"
+        except HTTPException:
+            pass
+    return get_remote_address(request)
+
+
+# Serialized /shared/{token} responses: token -> (etag, body). A trip has at most
+# one live share token, so the trip -> token map is enough to invalidate.
+SHARED_TRIP_TTL_SECONDS = 60
+shared_trip_cache = TTLCache(maxsize=1024, ttl=SHARED_TRIP_TTL_SECONDS)
+_shared_token_by_trip = TTLCache(maxsize=1024, ttl=SHARED_TRIP_TTL_SECONDS)
+
+# Generation of the last invalidation, per trip and overall. A render notes the
+# overall one before it reads anything (it does not know the trip yet), and its
+# result is only stored if its trip has not been invalidated since.
+_shared_trip_generation = 0
+_shared_trip_invalidated_at = TTLCache(maxsize=4096, ttl=SHARED_TRIP_TTL_SECONDS)
+
+
+def shared_trip_generation() -> int:
+    """Generation to take before rendering a shared view; pass it to cache_shared_trip."""
+    return _shared_trip_generation
+
+
+def cache_shared_trip(
+    token: str, trip_id: UUID, entry: tuple[str, bytes], ttl: float, generation: int
+) -> None:
+    # Invalidated while rendering: the entry may have been built from pre-edit rows
+    if _shared_trip_invalidated_at.get(trip_id, 0) > generation:
+        return
+    shared_trip_cache.set(token, entry, ttl=ttl)
+    _shared_token_by_trip.set(trip_id, token, ttl=ttl)
+
+
+def invalidate_shared_trip(trip_id: UUID) -> None:
+    """Drop the cached public view of a trip; call after any itinerary change."""
+    global _shared_trip_generation
+    _shared_trip_generation += 1
+    _shared_trip_invalidated_at.set(trip_id, _shared_trip_generation)
+    token = _shared_token_by_trip.get(trip_id)
+    if token is not None:
+        shared_trip_cache.pop(token)
+        _shared_token_by_trip.pop(trip_id)
 
 
 async def verify_trip_ownership(trip_id: UUID, user: User, db: AsyncSession) -> Trip:
@@ -22,6 +82,17 @@ async def verify_trip_ownership(trip_id: UUID, user: User, db: AsyncSession) ->
     return trip
 
 
+def trip_owned_by(trip_id: UUID, user: User):
+    """EXISTS clause that is true when the trip belongs to the user."""
+    return exists().where(Trip.id == trip_id, Trip.user_id == user.id)
+
+
+async def verify_trip_ownership_exists(trip_id: UUID, user: User, db: AsyncSession) -> None:
+    """Like verify_trip_ownership, for handlers that never touch the Trip row."""
+    if not await db.scalar(select(trip_owned_by(trip_id, user))):
+        raise HTTPException(status_code=404, detail="Trip not found")
+
+
 async def verify_stop_ownership(stop_id: UUID, user: User, db: AsyncSession) -> TripStop:
     stop = await db.get(TripStop, stop_id)
     if not stop:
@@ -32,41 +103,73 @@ async def verify_stop_ownership(stop_id: UUID, user: User, db: AsyncSession) ->
     return stop
 
 
+async def _fetch_all(db: AsyncSession, statement) -> list:
+    """Run an ORM query and return its entities, de-duplicated for joined eager loads."""
+    result = await db.execute(statement)
+    return list(result.unique().scalars().all())
+
+
 async def load_itinerary(trip_id: UUID, db: AsyncSession):
     """Load stops, movements, and activities (with photos) for a trip.
 
+    Exactly three statements, run one after another on the request session:
+    fanning them out over extra pooled connections would cost three
+    connections per render and read each list in its own transaction, for a
+    saving of a couple of local round trips. Every relationship that is not
+    loaded explicitly raises on access instead of silently issuing a query
+    per row.
+
     Returns (stops, movements, all_activities, movement_by_from, activities_by_stop).
     """
-    # Load stops sorted by sort_index
-    stops_result = await db.execute(
-        select(TripStop)
-        .where(TripStop.trip_id == trip_id)
-        .order_by(TripStop.sort_index)
-    )
-    stops = stops_result.scalars().all()
+    # lambda_stmt builds each statement (and its cache key) once per process;
+    # later calls only bind trip_id.
 
-    # Load all movements for this trip
-    movements_result = await db.execute(
-        select(Movement).where(Movement.trip_id == trip_id)
+    # Stops sorted by sort_index
+    stops = await _fetch_all(
+        db,
+        lambda_stmt(
+            lambda: select(TripStop)
+            .options(raiseload("*"))
+            .where(TripStop.trip_id == trip_id)
+            .order_by(TripStop.sort_index)
+        ),
+    )
+    # All movements for this trip
+    movements = await _fetch_all(
+        db,
+        lambda_stmt(lambda: select(Movement).options(raiseload("*")).where(Movement.trip_id == trip_id)),
+    )
+    # All activities for stops in this trip, photos joined into the same statement,
+    # ordered so they can be grouped by stop in one pass
+    all_activities = await _fetch_all(
+        db,
+        lambda_stmt(
+            lambda: select(Activity)
+            .options(joinedload(Activity.photos), raiseload("*"))
+            .join(TripStop, Activity.trip_stop_id == TripStop.id)
+            .where(TripStop.trip_id == trip_id)
+            .order_by(Activity.trip_stop_id, Activity.sort_index)
+        ),
     )
-    movements = movements_result.scalars().all()
     movement_by_from = {m.from_stop_id: m for m in movements}
 
-    # Load all activities for stops in this trip (with photos)
-    stop_ids = [s.id for s in stops]
-    if stop_ids:
-        activities_result = await db.execute(
-            select(Activity)
-            .options(selectinload(Activity.photos))
-            .where(Activity.trip_stop_id.in_(stop_ids))
-            .order_by(Activity.sort_index)
-        )
-        all_activities = activities_result.scalars().all()
-    else:
-        all_activities = []
-
-    activities_by_stop: dict[UUID, list] = {}
-    for a in all_activities:
-        activities_by_stop.setdefault(a.trip_stop_id, []).append(a)
+    # Activities arrive grouped by stop (the uq_activity_sort index order)
+    activities_by_stop = {
+        stop_id: list(group) for stop_id, group in groupby(all_activities, key=attrgetter("trip_stop_id"))
+    }
 
     return stops, movements, all_activities, movement_by_from, activities_by_stop
+
+
+async def load_itinerary_if_owned(trip_id: UUID, user: User, db: AsyncSession):
+    """Load a trip and its itinerary, or None if the trip is not the user's.
+
+    Ownership is checked before anything else is read, so a guessed trip id
+    never costs more than the one primary-key lookup.
+
+    Returns (trip, stops, movements, all_activities, movement_by_from, activities_by_stop).
+    """
+    trip = await db.get(Trip, trip_id)
+    if not trip or trip.user_id != user.id:
+        return None
+    return (trip, *await load_itinerary(trip_id, db))
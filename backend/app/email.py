@@ -1,8 +1,7 @@
 import logging
 
-import httpx
-
 from app.config import settings
+from app.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -14,21 +13,20 @@ async def send_email(to: str, subject: str, html: str) -> bool:
         return False
 
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.post(
-                "https://api.resend.com/emails",
-                headers={"Authorization": f"Bearer {settings.RESEND_API_KEY}"},
-                json={
-                    "from": settings.RESEND_FROM_EMAIL,
-                    "to": [to],
-                    "subject": subject,
-                    "html": html,
-                },
-            )
-            if resp.status_code >= 400:
-                logger.error("Resend API error %s: %s", resp.status_code, resp.text)
-                return False
-            return True
+        resp = await get_http_client().post(
+            "https://api.resend.com/emails",
+            headers={"Authorization": f"Bearer {settings.RESEND_API_KEY}"},
+            json={
+                "from": settings.RESEND_FROM_EMAIL,
+                "to": [to],
+                "subject": subject,
+                "html": html,
+            },
+        )
+        if resp.status_code >= 400:
+            logger.error("Resend API error %s: %s", resp.status_code, resp.text)
+            return False
+        return True
     except Exception:
         logger.exception("Failed to send email to %s", to)
         return False
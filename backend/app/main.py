@@ -1,3 +1,6 @@
+import json
+import logging
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
@@ -6,10 +9,14 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
-from app.database import create_tables
+from app.config import settings
+from app.database import create_tables, enable_query_counting, track_queries
 from app.dependencies import TESTING
+from app.http_client import close_http_client
 from app.routers import activities, auth, feedback, generate, movements, org, password_reset, share, stops, trips, versions
 
+logger = logging.getLogger(__name__)
+
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["60/minute"],
@@ -21,12 +28,36 @@ limiter = Limiter(
 async def lifespan(app: FastAPI):
     await create_tables()
     yield
+    await close_http_client()
 
 
 app = FastAPI(title="PlanTrip API", lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+if settings.DB_QUERY_LOG_ENABLED:
+    enable_query_counting()
+
+    @app.middleware("http")
+    async def log_db_queries(request: Request, call_next):
+        """Log how many SQL statements each request ran, to spot N+1 regressions."""
+        started = time.perf_counter()
+        with track_queries() as queries:
+            response = await call_next(request)
+        record = {
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "queries": queries.count,
+            "ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        if queries.count > settings.DB_QUERY_WARN_THRESHOLD:
+            logger.warning("db queries over budget: %s", json.dumps(record))
+        else:
+            logger.info("db queries: %s", json.dumps(record))
+        return response
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://localhost:3000"],
@@ -16,6 +16,7 @@ from sqlalchemy import (
     Time,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
@@ -27,6 +28,10 @@ class Base(DeclarativeBase):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Login, signup, password reset and invites look users up by lower(email)
+        Index("idx_users_email_lower", func.lower(text("email"))),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     email: Mapped[str] = mapped_column(String(320), unique=True, nullable=False)
@@ -49,8 +54,11 @@ class Trip(Base):
         ),
         CheckConstraint("currency ~ '^[A-Z]{3}$'", name="ck_trips_currency"),
         Index("idx_trips_user_created", "user_id", "created_at"),
-        Index("idx_trips_organization_id", "organization_id"),
+        Index("idx_trips_org_created", "organization_id", "created_at"),
+        Index("idx_trips_org_user", "organization_id", "user_id"),
     )
+    # Load created_at/updated_at via INSERT ... RETURNING instead of a refresh after commit
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -76,9 +84,10 @@ class Trip(Base):
 class TripStop(Base):
     __tablename__ = "trip_stops"
     __table_args__ = (
-        UniqueConstraint("trip_id", "sort_index", name="uq_trip_stop_sort"),
+        UniqueConstraint("trip_id", "sort_index", name="uq_trip_stop_sort", deferrable=True, initially="DEFERRED"),
         CheckConstraint("nights >= 1", name="ck_trip_stop_nights_min"),
     )
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     trip_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("trips.id", ondelete="CASCADE"), nullable=False)
@@ -135,7 +144,7 @@ class Movement(Base):
 class Activity(Base):
     __tablename__ = "activities"
     __table_args__ = (
-        UniqueConstraint("trip_stop_id", "sort_index", name="uq_activity_sort"),
+        UniqueConstraint("trip_stop_id", "sort_index", name="uq_activity_sort", deferrable=True, initially="DEFERRED"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
@@ -163,7 +172,9 @@ class Activity(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
     stop: Mapped["TripStop"] = relationship(back_populates="activities")
-    photos: Mapped[list["ActivityPhoto"]] = relationship(back_populates="activity", cascade="all, delete-orphan")
+    photos: Mapped[list["ActivityPhoto"]] = relationship(
+        back_populates="activity", cascade="all, delete-orphan", order_by="ActivityPhoto.sort_index"
+    )
     feedback: Mapped[list["ActivityFeedback"]] = relationship(back_populates="activity")
 
 
@@ -208,6 +219,8 @@ class OrganizationMember(Base):
     __table_args__ = (
         UniqueConstraint("organization_id", "user_id", name="uq_org_member"),
         Index("idx_org_members_user_id", "user_id"),
+        Index("idx_org_members_org_created", "organization_id", "created_at"),
+        Index("idx_org_members_org_admins", "organization_id", postgresql_where=text("role = 'admin'")),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
@@ -222,12 +235,17 @@ class OrganizationMember(Base):
 
 class OrganizationInvite(Base):
     __tablename__ = "organization_invites"
+    __table_args__ = (
+        Index("idx_org_invites_org_pending", "organization_id", postgresql_where=text("accepted_at IS NULL")),
+    )
+    # Load created_at via INSERT ... RETURNING instead of a refresh after commit
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     organization_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False)
     email: Mapped[str] = mapped_column(String(320), nullable=False)
     role: Mapped[str] = mapped_column(String(20), nullable=False, default="designer")
-    token: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
+    token_hash: Mapped[str] = mapped_column(String(128), unique=True, nullable=False)
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     accepted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -237,11 +255,16 @@ class OrganizationInvite(Base):
 
 class ShareToken(Base):
     __tablename__ = "share_tokens"
+    __table_args__ = (
+        # Covers the public /shared/{token} check without touching the heap
+        Index("idx_share_tokens_token", "token", postgresql_include=["trip_id", "expires_at"]),
+        Index("idx_share_tokens_expires_at", "expires_at"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     trip_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("trips.id", ondelete="CASCADE"), nullable=False)
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    token: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
+    token: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
@@ -300,6 +323,7 @@ class TripVersion(Base):
     trip_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("trips.id", ondelete="CASCADE"), nullable=False, index=True)
     version_number: Mapped[int] = mapped_column(Integer, nullable=False)
     label: Mapped[str] = mapped_column(String(200), nullable=False, server_default="")
+    # STORAGE EXTERNAL in init.sql / migration 008: TOASTed without compression
     snapshot_data: Mapped[dict] = mapped_column(JSONB, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
@@ -1,15 +1,18 @@
+import asyncio
+import time
 from uuid import UUID
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import delete, func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import contains_eager, selectinload
 
 from app.auth import get_current_user
+from app.cache import TTLCache
 from app.config import settings
 from app.database import get_db
-from app.dependencies import verify_stop_ownership
+from app.dependencies import invalidate_shared_trip, verify_stop_ownership
+from app.http_client import get_http_client
 from app.models import Activity, ActivityPhoto, Trip, TripStop, User
 from app.schemas import (
     ActivityCreate,
@@ -21,14 +24,108 @@ from app.schemas import (
 
 router = APIRouter(tags=["activities"])
 
+# Unsplash search results per normalized query. The demo tier allows 50
+# requests/hour, and the same "title stop" queries recur across trips.
+UNSPLASH_SEARCH_TTL_SECONDS = 3600
+_unsplash_cache = TTLCache(maxsize=1000, ttl=UNSPLASH_SEARCH_TTL_SECONDS)
+_unsplash_inflight: dict[str, asyncio.Task] = {}
+
+# Outbound backpressure: a few concurrent calls at most, and once Unsplash
+# reports the quota exhausted, fail fast until its Retry-After has passed.
+UNSPLASH_MAX_CONCURRENCY = 4
+UNSPLASH_DEFAULT_BACKOFF_SECONDS = 60
+_unsplash_semaphore = asyncio.Semaphore(UNSPLASH_MAX_CONCURRENCY)
+_unsplash_blocked_until = 0.0
+
+
+def _unsplash_rate_limited() -> HTTPException:
+    retry_after = max(1, int(_unsplash_blocked_until - time.monotonic()))
+    return HTTPException(
+        status_code=503,
+        detail="Photo service is rate limited, try again later",
+        headers={"Retry-After": str(retry_after)},
+    )
 
-async def _verify_activity_ownership(activity_id: UUID, user: User, db: AsyncSession) -> Activity:
-    result = await db.execute(
+
+def _unsplash_photo_fields(result: dict) -> dict:
+    """Reduce an Unsplash search result to the ActivityPhoto columns we store."""
+    urls = result["urls"]
+    photographer = result["user"]
+    return {
+        "url": urls.get("regular", ""),
+        "thumbnail_url": urls.get("small", ""),
+        "attribution": f"Photo by {photographer['name']} on Unsplash",
+        "photographer_name": photographer["name"],
+        "photographer_url": photographer["links"].get("html", ""),
+        "source": "unsplash",
+        "width": result.get("width"),
+        "height": result.get("height"),
+    }
+
+
+async def _fetch_unsplash(query: str, cache_key: str) -> list[dict]:
+    global _unsplash_blocked_until
+    if time.monotonic() < _unsplash_blocked_until:
+        raise _unsplash_rate_limited()
+
+    async with _unsplash_semaphore:
+        resp = await get_http_client().get(
+            "https://api.unsplash.com/search/photos",
+            params={"query": query, "per_page": 6, "orientation": "landscape"},
+            headers={"Authorization": f"Client-ID {settings.UNSPLASH_ACCESS_KEY}"},
+        )
+
+    quota_exhausted = resp.status_code == 429 or (
+        resp.status_code == 403 and resp.headers.get("X-Ratelimit-Remaining") == "0"
+    )
+    if quota_exhausted:
+        retry_after = resp.headers.get("Retry-After", "")
+        backoff = int(retry_after) if retry_after.isdigit() else UNSPLASH_DEFAULT_BACKOFF_SECONDS
+        _unsplash_blocked_until = time.monotonic() + backoff
+        raise _unsplash_rate_limited()
+    if resp.status_code != 200:
+        raise HTTPException(status_code=502, detail="Failed to fetch photos")
+    results = [_unsplash_photo_fields(result) for result in resp.json().get("results", [])]
+    _unsplash_cache.set(cache_key, results)
+    return results
+
+
+async def _search_unsplash(query: str) -> list[dict]:
+    """Return ActivityPhoto fields for an Unsplash search, cached per query.
+
+    Concurrent misses for the same query share a single outbound request.
+    """
+    cache_key = " ".join(query.lower().split())
+    results = _unsplash_cache.get(cache_key)
+    if results is not None:
+        return results
+
+    task = _unsplash_inflight.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_unsplash(query, cache_key))
+        _unsplash_inflight[cache_key] = task
+        task.add_done_callback(lambda _: _unsplash_inflight.pop(cache_key, None))
+    # Shielded so one caller disconnecting does not cancel the others' fetch
+    return await asyncio.shield(task)
+
+
+async def _verify_activity_ownership(
+    activity_id: UUID, user: User, db: AsyncSession, *, with_photos: bool = False
+) -> Activity:
+    """Load an activity owned by the user, with its stop from the same join.
+
+    with_photos also batch-loads the photos, so readers need no second query.
+    """
+    query = (
         select(Activity)
         .join(TripStop, Activity.trip_stop_id == TripStop.id)
         .join(Trip, TripStop.trip_id == Trip.id)
+        .options(contains_eager(Activity.stop))
         .where(Activity.id == activity_id, Trip.user_id == user.id)
     )
+    if with_photos:
+        query = query.options(selectinload(Activity.photos))
+    result = await db.execute(query)
     activity = result.scalars().first()
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
@@ -58,7 +155,7 @@ async def create_activity(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_stop_ownership(stop_id, user, db)
+    stop = await verify_stop_ownership(stop_id, user, db)
 
     # Auto-assign sort_index
     result = await db.execute(
@@ -92,6 +189,7 @@ async def create_activity(
     )
     db.add(activity)
     await db.commit()
+    invalidate_shared_trip(stop.trip_id)
     # Re-load with photos to avoid lazy-loading in async context
     result = await db.execute(
         select(Activity)
@@ -115,6 +213,7 @@ async def update_activity(
         setattr(activity, key, value)
 
     await db.commit()
+    invalidate_shared_trip(activity.stop.trip_id)
     # Re-load with photos
     result = await db.execute(
         select(Activity)
@@ -132,6 +231,7 @@ async def delete_activity(
 ):
     activity = await _verify_activity_ownership(activity_id, user, db)
     stop_id = activity.trip_stop_id
+    trip_id = activity.stop.trip_id
 
     await db.delete(activity)
     await db.flush()
@@ -150,6 +250,7 @@ async def delete_activity(
         a.sort_index = i
 
     await db.commit()
+    invalidate_shared_trip(trip_id)
 
 
 @router.get("/activities/{activity_id}", response_model=ActivityDetailResponse)
@@ -158,13 +259,7 @@ async def get_activity(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await _verify_activity_ownership(activity_id, user, db)
-    result = await db.execute(
-        select(Activity)
-        .options(selectinload(Activity.photos))
-        .where(Activity.id == activity_id)
-    )
-    return result.scalars().first()
+    return await _verify_activity_ownership(activity_id, user, db, with_photos=True)
 
 
 @router.post("/activities/{activity_id}/photos", response_model=list[ActivityPhotoResponse])
@@ -179,21 +274,10 @@ async def refresh_photos(
         raise HTTPException(status_code=503, detail="Photo service not configured")
 
     # Build search query: "title stopName"
-    stop = await db.get(TripStop, activity.trip_stop_id)
-    query = activity.title
-    if stop:
-        query = f"{activity.title} {stop.name}"
+    query = f"{activity.title} {activity.stop.name}"
 
     # Fetch from Unsplash
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        resp = await client.get(
-            "https://api.unsplash.com/search/photos",
-            params={"query": query, "per_page": 6, "orientation": "landscape"},
-            headers={"Authorization": f"Client-ID {settings.UNSPLASH_ACCESS_KEY}"},
-        )
-        if resp.status_code != 200:
-            raise HTTPException(status_code=502, detail="Failed to fetch photos")
-        data = resp.json()
+    results = await _search_unsplash(query)
 
     # Delete old photos for this activity
     await db.execute(
@@ -202,23 +286,13 @@ async def refresh_photos(
 
     # Insert new photos
     photos = []
-    for i, result in enumerate(data.get("results", [])):
-        photo = ActivityPhoto(
-            activity_id=activity_id,
-            url=result["urls"].get("regular", ""),
-            thumbnail_url=result["urls"].get("small", ""),
-            attribution=f"Photo by {result['user']['name']} on Unsplash",
-            photographer_name=result["user"]["name"],
-            photographer_url=result["user"]["links"].get("html", ""),
-            source="unsplash",
-            width=result.get("width"),
-            height=result.get("height"),
-            sort_index=i,
-        )
+    for i, fields in enumerate(results):
+        photo = ActivityPhoto(activity_id=activity_id, sort_index=i, **fields)
         db.add(photo)
         photos.append(photo)
 
     await db.commit()
+    invalidate_shared_trip(activity.stop.trip_id)
     for p in photos:
         await db.refresh(p)
 
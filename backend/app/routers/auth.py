@@ -10,12 +10,12 @@ from app.auth import (
     create_refresh_token,
     decode_token,
     get_current_user,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
 )
 from app.config import settings
 from app.database import get_db
-from app.dependencies import limiter
+from app.dependencies import limiter, user_or_ip_key
 from app.email import send_email_verification, send_welcome_email
 from app.models import Organization, OrganizationMember, User
 from app.schemas import OrgInfo, UserLogin, UserRegister, UserResponse, VerifyEmailRequest
@@ -66,7 +66,7 @@ async def register(request: Request, data: UserRegister, response: Response, db:
     verification_token = secrets.token_urlsafe(48)
     user = User(
         email=normalized_email,
-        hashed_password=hash_password(data.password),
+        hashed_password=await hash_password_async(data.password),
         email_verification_token=hash_token(verification_token),
         email_verification_sent_at=datetime.now(timezone.utc),
     )
@@ -90,7 +90,7 @@ async def login(request: Request, data: UserLogin, response: Response, db: Async
     result = await db.execute(select(User).where(func.lower(User.email) == normalized_email))
     user = result.scalars().first()
 
-    if not user or not verify_password(data.password, user.hashed_password):
+    if not user or not await verify_password_async(data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     _set_auth_cookies(response, user)
@@ -187,7 +187,7 @@ async def verify_email(data: VerifyEmailRequest, db: AsyncSession = Depends(get_
 
 
 @router.post("/resend-verification")
-@limiter.limit("2/minute")
+@limiter.limit("2/minute", key_func=user_or_ip_key)
 async def resend_verification(
     request: Request,
     user: User = Depends(get_current_user),
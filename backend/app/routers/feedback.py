@@ -7,7 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_db
-from app.dependencies import limiter, verify_trip_ownership
+from app.dependencies import limiter, verify_trip_ownership_exists
 from app.models import Activity, ActivityFeedback, ShareToken, TripStop, TripVersion, Trip, User
 from app.schemas import (
     ActivityFeedbackSummary,
@@ -90,7 +90,7 @@ async def get_trip_feedback(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
+    await verify_trip_ownership_exists(trip_id, user, db)
 
     # Get all feedback for this trip directly via trip_id FK
     feedback_result = await db.execute(
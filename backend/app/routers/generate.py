@@ -1,3 +1,5 @@
+import hashlib
+import json
 from datetime import time, timedelta
 from uuid import UUID
 
@@ -7,26 +9,37 @@ from sqlalchemy import delete, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
+from app.cache import TTLCache
 from app.config import settings
 from app.database import get_db
-from app.dependencies import TESTING, limiter, load_itinerary, verify_trip_ownership
+from app.dependencies import (
+    TESTING,
+    invalidate_shared_trip,
+    limiter,
+    load_itinerary,
+    user_or_ip_key,
+    verify_trip_ownership,
+)
 from app.models import Activity, Movement, Trip, TripStop, User
-from app.routers.stops import recalculate_end_date
 from app.routers.trips import compute_budget
-from app.schemas import (
-    ItineraryResponse,
-    ItineraryStopResponse,
-)
+from app.schemas import ItineraryResponse
 
 router = APIRouter(tags=["generate"])
 
-VALID_MOVEMENT_TYPES = {"train", "bus", "flight", "car", "ferry", "walk"}
-VALID_CATEGORIES = {
+VALID_MOVEMENT_TYPES = frozenset({"train", "bus", "flight", "car", "ferry", "walk"})
+VALID_CATEGORIES = frozenset({
     "sightseeing", "food", "museum", "outdoors", "shopping",
-    "nightlife", "culture", "relaxation", "adventure", "transport", ""
-}
+    "nightlife", "culture", "relaxation", "adventure", "transport",
+})
+_CATEGORIES_OR_EMPTY = VALID_CATEGORIES | {""}
+_DAY_DELTAS = tuple(timedelta(days=i) for i in range(30))
 MAX_STOPS = 20
 
+# Generated itineraries keyed by a hash of the full model request (model,
+# system prompt, tool schema, messages): identical requests from any user or
+# trip reuse the earlier answer instead of calling the model again.
+_ITINERARY_CACHE = TTLCache(maxsize=256, ttl=7 * 24 * 3600)
+
 
 class GenerateRequest(BaseModel):
     prompt: str = Field(..., min_length=1, max_length=2000)
@@ -171,21 +184,29 @@ ITINERARY_TOOL = {
 }
 
 
+_SYSTEM_PROMPT_INTRO = (
+    "You are a travel planning assistant. Create a detailed trip itinerary.\n\n"
+    "Trip details:\n"
+)
+_SYSTEM_PROMPT_GUIDELINES = (
+    "- Plan 2-4 activities per day\n"
+    "- Include a mix of activity categories (sightseeing, food, museum, culture, etc.)\n"
+    "- Add transport movements between consecutive stops\n"
+    "- Set appropriate number of nights for each stop based on the number of activities\n"
+    "- You MUST call the create_itinerary tool with your response\n"
+)
+
+
 def _build_system_prompt(trip: Trip) -> str:
     return (
-        f"You are a travel planning assistant. Create a detailed trip itinerary.\n\n"
-        f"Trip details:\n"
+        f"{_SYSTEM_PROMPT_INTRO}"
         f"- Country: {trip.country_code}\n"
         f"- Start date: {trip.start_date.isoformat()}\n"
         f"- Currency: {trip.currency}\n\n"
-        f"Guidelines:\n"
-        f"- Use accurate real-world coordinates (longitude, latitude) for all stops and activities\n"
+        "Guidelines:\n"
+        "- Use accurate real-world coordinates (longitude, latitude) for all stops and activities\n"
         f"- Provide realistic prices and durations in {trip.currency}\n"
-        f"- Plan 2-4 activities per day\n"
-        f"- Include a mix of activity categories (sightseeing, food, museum, culture, etc.)\n"
-        f"- Add transport movements between consecutive stops\n"
-        f"- Set appropriate number of nights for each stop based on the number of activities\n"
-        f"- You MUST call the create_itinerary tool with your response\n"
+        f"{_SYSTEM_PROMPT_GUIDELINES}"
     )
 
 
@@ -195,18 +216,66 @@ def _validate_coordinate(lng: float, lat: float) -> tuple[float, float]:
     return lng, lat
 
 
+def _movement_type(raw_type) -> str:
+    # The tool schema constrains "type" to an enum, so the happy path is a single lookup
+    if isinstance(raw_type, str) and raw_type in VALID_MOVEMENT_TYPES:
+        return raw_type
+    return "train"
+
+
 def _parse_time(time_str: str | None) -> time | None:
     if not time_str:
         return None
+    time_str = time_str.strip()
+    if len(time_str) >= 5:
+        try:
+            # Fast path for the "HH:MM" format requested in the tool schema
+            return time.fromisoformat(time_str[:5])
+        except ValueError:
+            pass
     try:
-        parts = time_str.strip().split(":")
+        parts = time_str.split(":")
         return time(int(parts[0]), int(parts[1]))
     except (ValueError, IndexError):
         return None
 
 
+def _request_hash(request_kwargs: dict) -> str:
+    payload = json.dumps(request_kwargs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def _request_itinerary(request_kwargs: dict) -> dict:
+    import anthropic
+
+    client = anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+    try:
+        response = await client.messages.create(**request_kwargs)
+    except anthropic.AuthenticationError:
+        raise HTTPException(status_code=503, detail="Invalid Anthropic API key")
+    except anthropic.BadRequestError as e:
+        msg = str(e)
+        if "credit balance" in msg.lower():
+            raise HTTPException(status_code=503, detail="Anthropic account has insufficient credits")
+        raise HTTPException(status_code=502, detail="AI request failed")
+    except anthropic.APIError:
+        raise HTTPException(status_code=502, detail="AI service is temporarily unavailable")
+
+    # Extract tool_use result
+    tool_input = None
+    for block in response.content:
+        if block.type == "tool_use" and block.name == "create_itinerary":
+            tool_input = block.input
+            break
+
+    if not tool_input or "stops" not in tool_input:
+        raise HTTPException(status_code=502, detail="AI did not generate a valid itinerary")
+
+    return tool_input
+
+
 @router.post("/trips/{trip_id}/generate", response_model=ItineraryResponse)
-@limiter.limit("3/hour")
+@limiter.limit("3/hour", key_func=user_or_ip_key)
 async def generate_itinerary(
     request: Request,
     trip_id: UUID,
@@ -225,37 +294,19 @@ async def generate_itinerary(
         if not settings.ANTHROPIC_API_KEY:
             raise HTTPException(status_code=503, detail="AI generation is not configured")
 
-        import anthropic
-
-        client = anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
-        try:
-            response = await client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4096,
-                system=_build_system_prompt(trip),
-                messages=[{"role": "user", "content": data.prompt}],
-                tools=[ITINERARY_TOOL],
-                tool_choice={"type": "tool", "name": "create_itinerary"},
-            )
-        except anthropic.AuthenticationError:
-            raise HTTPException(status_code=503, detail="Invalid Anthropic API key")
-        except anthropic.BadRequestError as e:
-            msg = str(e)
-            if "credit balance" in msg.lower():
-                raise HTTPException(status_code=503, detail="Anthropic account has insufficient credits")
-            raise HTTPException(status_code=502, detail="AI request failed")
-        except anthropic.APIError:
-            raise HTTPException(status_code=502, detail="AI service is temporarily unavailable")
-
-        # Extract tool_use result
-        tool_input = None
-        for block in response.content:
-            if block.type == "tool_use" and block.name == "create_itinerary":
-                tool_input = block.input
-                break
-
-        if not tool_input or "stops" not in tool_input:
-            raise HTTPException(status_code=502, detail="AI did not generate a valid itinerary")
+        request_kwargs = {
+            "model": "claude-sonnet-4-20250514",
+            "max_tokens": 4096,
+            "system": _build_system_prompt(trip),
+            "messages": [{"role": "user", "content": data.prompt}],
+            "tools": [ITINERARY_TOOL],
+            "tool_choice": {"type": "tool", "name": "create_itinerary"},
+        }
+        cache_key = _request_hash(request_kwargs)
+        tool_input = _ITINERARY_CACHE.get(cache_key)
+        if tool_input is None:
+            tool_input = await _request_itinerary(request_kwargs)
+            _ITINERARY_CACHE.set(cache_key, tool_input)
 
     raw_stops = tool_input.get("stops", [])
     raw_movements = tool_input.get("movements", [])
@@ -302,14 +353,17 @@ async def generate_itinerary(
     await db.flush()
 
     # 6. Insert activities
+    activity_base_dates = [trip.start_date + timedelta(days=n) for n in cumulative_nights]
     all_activities = []
     for stop_idx, raw_stop in enumerate(raw_stops):
         raw_activities = raw_stop.get("activities", [])
+        base_date = activity_base_dates[stop_idx]
         for act_idx, raw_act in enumerate(raw_activities):
             day_offset = max(0, int(raw_act.get("day_offset", 0)))
-            activity_date = trip.start_date + timedelta(
-                days=cumulative_nights[stop_idx] + day_offset
-            )
+            if day_offset < len(_DAY_DELTAS):
+                activity_date = base_date + _DAY_DELTAS[day_offset]
+            else:
+                activity_date = base_date + timedelta(days=day_offset)
             act_lng = raw_act.get("lng")
             act_lat = raw_act.get("lat")
             if act_lng is not None and act_lat is not None:
@@ -317,8 +371,8 @@ async def generate_itinerary(
             else:
                 act_lng, act_lat = None, None
 
-            category = str(raw_act.get("category", ""))
-            if category not in VALID_CATEGORIES:
+            category = raw_act.get("category", "")
+            if not isinstance(category, str) or category not in _CATEGORIES_OR_EMPTY:
                 category = ""
 
             activity = Activity(
@@ -340,52 +394,48 @@ async def generate_itinerary(
 
     await db.flush()
 
-    # 7. Insert movements
-    created_movements = []
+    # 7. Insert movements (single pass: drop out-of-range, self-loop and duplicate pairs)
+    n_stops = len(created_stops)
     seen_pairs = set()
+    valid_movements = []
     for raw_mov in raw_movements:
         from_idx = raw_mov.get("from_stop_index")
         to_idx = raw_mov.get("to_stop_index")
         if (
             from_idx is None
             or to_idx is None
-            or from_idx < 0
-            or to_idx < 0
-            or from_idx >= len(created_stops)
-            or to_idx >= len(created_stops)
+            or not (0 <= from_idx < n_stops and 0 <= to_idx < n_stops)
             or from_idx == to_idx
+            or (from_idx, to_idx) in seen_pairs
         ):
             continue
+        seen_pairs.add((from_idx, to_idx))
+        valid_movements.append((from_idx, to_idx, raw_mov))
 
-        pair = (from_idx, to_idx)
-        if pair in seen_pairs:
-            continue
-        seen_pairs.add(pair)
-
-        mov_type = str(raw_mov.get("type", "train"))
-        if mov_type not in VALID_MOVEMENT_TYPES:
-            mov_type = "train"
-
-        movement = Movement(
+    created_movements = [
+        Movement(
             trip_id=trip_id,
             from_stop_id=created_stops[from_idx].id,
             to_stop_id=created_stops[to_idx].id,
-            type=mov_type,
+            type=_movement_type(raw_mov.get("type", "train")),
             duration_minutes=raw_mov.get("duration_minutes"),
             carrier=str(raw_mov.get("carrier", ""))[:200],
             notes=str(raw_mov.get("notes", ""))[:10000],
             price=raw_mov.get("price"),
         )
-        db.add(movement)
-        created_movements.append(movement)
+        for from_idx, to_idx, raw_mov in valid_movements
+    ]
+    db.add_all(created_movements)
 
     await db.flush()
 
-    # 8. Recalculate end date
-    await recalculate_end_date(trip_id, db)
+    # 8. Recalculate end date from the nights tallied in step 5 (same rule as
+    #    recalculate_end_date, without re-reading the stops just written)
+    trip.end_date = trip.start_date + timedelta(days=max(nights_so_far - 1, 0))
 
     # 9. Commit and reload
     await db.commit()
+    invalidate_shared_trip(trip_id)
 
     # Reload trip
     await db.refresh(trip)
@@ -393,14 +443,17 @@ async def generate_itinerary(
     # Reload full itinerary
     stops, movements, all_activities, movement_by_from, activities_by_stop = await load_itinerary(trip_id, db)
 
+    # Plain dicts of ORM objects, validated in the single model_validate below
     itinerary_stops = [
-        ItineraryStopResponse(
-            stop=stop,
-            activities=activities_by_stop.get(stop.id, []),
-            movement_to_next=movement_by_from.get(stop.id),
-        )
+        {
+            "stop": stop,
+            "activities": activities_by_stop.get(stop.id, []),
+            "movement_to_next": movement_by_from.get(stop.id),
+        }
         for stop in stops
     ]
 
     budget = compute_budget(stops, all_activities, movements)
-    return ItineraryResponse(trip=trip, stops=itinerary_stops, budget=budget)
+    return ItineraryResponse.model_validate(
+        {"trip": trip, "stops": itinerary_stops, "budget": budget}, from_attributes=True
+    )
@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_db
-from app.dependencies import verify_trip_ownership
+from app.dependencies import invalidate_shared_trip, verify_trip_ownership_exists
 from app.models import Movement, Trip, User
 from app.schemas import MovementCreate, MovementResponse, MovementUpdate
 
@@ -31,7 +31,7 @@ async def list_movements(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
+    await verify_trip_ownership_exists(trip_id, user, db)
     result = await db.execute(
         select(Movement).where(Movement.trip_id == trip_id)
     )
@@ -45,7 +45,7 @@ async def upsert_movement(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
+    await verify_trip_ownership_exists(trip_id, user, db)
 
     # Check for existing movement with same from/to stops
     result = await db.execute(
@@ -67,6 +67,7 @@ async def upsert_movement(
         existing.notes = data.notes
         existing.price = data.price
         await db.commit()
+        invalidate_shared_trip(trip_id)
         await db.refresh(existing)
         return existing
 
@@ -86,6 +87,7 @@ async def upsert_movement(
     )
     db.add(movement)
     await db.commit()
+    invalidate_shared_trip(trip_id)
     await db.refresh(movement)
     return movement
 
@@ -104,6 +106,7 @@ async def update_movement(
         setattr(movement, key, value)
 
     await db.commit()
+    invalidate_shared_trip(movement.trip_id)
     await db.refresh(movement)
     return movement
 
@@ -117,3 +120,4 @@ async def delete_movement(
     movement = await _verify_movement_ownership(movement_id, user, db)
     await db.delete(movement)
     await db.commit()
+    invalidate_shared_trip(movement.trip_id)
@@ -1,15 +1,17 @@
-import re
 import secrets
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy import func, select
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from app.auth import get_current_user
+from app.cache import TTLCache
 from app.database import get_db
-from app.dependencies import limiter
+from app.dependencies import limiter, user_or_ip_key
 from app.email import send_invite_email
 from app.models import Organization, OrganizationInvite, OrganizationMember, Trip, User
 from app.permissions import get_org_membership, require_org_admin, require_org_member
@@ -25,30 +27,71 @@ from app.schemas import (
     TripsPerDesigner,
     UpdateMemberRoleRequest,
 )
+from app.token_utils import hash_token
 
 router = APIRouter(prefix="/org", tags=["organization"])
 
+_SLUG_CHARS = frozenset("abcdefghijklmnopqrstuvwxyz0123456789")
+SLUG_MAX_LENGTH = 50
+SLUG_INSERT_ATTEMPTS = 3
+
+# Org dashboards poll /org/stats; cache per organization for a short window and
+# drop the entry whenever trips or members of that organization change.
+ORG_STATS_TTL_SECONDS = 60
+_org_stats_cache = TTLCache(maxsize=1024, ttl=ORG_STATS_TTL_SECONDS)
+
+
+def invalidate_org_stats(org_id: UUID | None) -> None:
+    """Drop the cached stats for an organization (no-op for personal trips)."""
+    if org_id is not None:
+        _org_stats_cache.pop(org_id)
+
+
+# Public invite landing-page lookups, keyed by the hashed token so raw tokens
+# are never kept in memory. Entries never outlive the invite itself.
+INVITE_INFO_TTL_SECONDS = 300
+_invite_info_cache = TTLCache(maxsize=4096, ttl=INVITE_INFO_TTL_SECONDS)
+
+
+async def _pending_invite_token_hashes(org_id: UUID, db: AsyncSession) -> list[str]:
+    """Cache keys of an organization's pending invites (only those can be cached)."""
+    result = await db.scalars(
+        select(OrganizationInvite.token_hash).where(
+            OrganizationInvite.organization_id == org_id,
+            OrganizationInvite.accepted_at.is_(None),
+        )
+    )
+    return list(result)
+
+
+def _evict_invite_info(token_hashes: list[str]) -> None:
+    for token_hash in token_hashes:
+        _invite_info_cache.pop(token_hash)
+
 
 def generate_slug(name: str) -> str:
     """Generate a URL-friendly slug from organization name.
 
     Validates: alphanumeric + hyphens only, 3-50 chars.
     """
-    # Lowercase and replace non-alphanumeric with hyphens
-    slug = re.sub(r"[^a-z0-9]+", "-", name.lower())
-    # Strip leading/trailing hyphens
-    slug = slug.strip("-")
-    # Limit to 50 chars
-    slug = slug[:50].rstrip("-")
-
-    # Validate final slug: alphanumeric + hyphens only, 3-50 chars
-    if not slug or len(slug) < 3:
-        # Fallback: use random suffix to ensure uniqueness
-        slug = f"org-{secrets.token_hex(4)}"
-
-    # Final validation: only alphanumeric and hyphens
-    if not re.match(r"^[a-z0-9][a-z0-9-]*[a-z0-9]$", slug):
-        # If validation fails, generate a safe random slug
+    # Single pass: keep [a-z0-9], collapse every other run into one hyphen,
+    # and stop as soon as the 50-char limit is reached.
+    out = bytearray()
+    pending_dash = False
+    for ch in name.lower():
+        if ch in _SLUG_CHARS:
+            if pending_dash and out:
+                out.append(0x2D)  # "-"
+            pending_dash = False
+            out.append(ord(ch))
+            if len(out) >= SLUG_MAX_LENGTH:
+                break
+        else:
+            pending_dash = True
+    slug = out[:SLUG_MAX_LENGTH].decode("ascii").rstrip("-")
+
+    # Too short after cleaning: fall back to a random slug
+    if len(slug) < 3:
         slug = f"org-{secrets.token_hex(4)}"
 
     return slug
@@ -58,23 +101,52 @@ async def ensure_unique_slug(base_slug: str, db: AsyncSession, exclude_id: UUID
     """Ensure slug is unique, appending random suffix if needed."""
     slug = base_slug
     while True:
-        query = select(Organization).where(Organization.slug == slug)
+        query = select(Organization.id).where(Organization.slug == slug)
         if exclude_id:
             query = query.where(Organization.id != exclude_id)
-        result = await db.execute(query)
-        if not result.scalars().first():
+        result = await db.execute(query.limit(1))
+        if result.scalar_one_or_none() is None:
             return slug
         # Append random suffix
         suffix = secrets.token_hex(3)
         slug = f"{base_slug[:44]}-{suffix}"
 
 
-async def build_org_response(org: Organization, db: AsyncSession) -> OrganizationResponse:
-    """Build an OrganizationResponse with member count."""
-    count_result = await db.execute(
-        select(func.count()).select_from(OrganizationMember).where(OrganizationMember.organization_id == org.id)
+async def _insert_org_with_unique_slug(db: AsyncSession, name: str, base_slug: str) -> Organization:
+    """Insert an organization, retrying with a random suffix on slug conflict.
+
+    Relies on the unique constraint on slug so concurrent creates cannot both
+    claim the same slug, and the common case costs a single INSERT.
+    """
+    slug = base_slug
+    for _ in range(SLUG_INSERT_ATTEMPTS):
+        result = await db.execute(
+            pg_insert(Organization)
+            .values(name=name, slug=slug)
+            .on_conflict_do_nothing(index_elements=[Organization.slug])
+            .returning(Organization)
+        )
+        org = result.scalar_one_or_none()
+        if org is not None:
+            return org
+        slug = f"{base_slug[:44]}-{secrets.token_hex(3)}"
+    raise HTTPException(status_code=409, detail="Could not generate a unique slug, please try another name")
+
+
+async def _fetch_org_with_member_count(db: AsyncSession, org_id: UUID) -> tuple[Organization, int] | None:
+    """Load an organization together with its member count in a single query."""
+    result = await db.execute(
+        select(Organization, func.count(OrganizationMember.id).label("member_count"))
+        .outerjoin(OrganizationMember, OrganizationMember.organization_id == Organization.id)
+        .where(Organization.id == org_id)
+        .group_by(Organization.id)
+        .execution_options(populate_existing=True)
     )
-    member_count = count_result.scalar() or 0
+    return result.first()
+
+
+def build_org_response(org: Organization, member_count: int) -> OrganizationResponse:
+    """Build an OrganizationResponse with member count."""
     return OrganizationResponse(
         id=org.id,
         name=org.name,
@@ -85,27 +157,33 @@ async def build_org_response(org: Organization, db: AsyncSession) -> Organizatio
     )
 
 
-def _validate_invite(invite: OrganizationInvite) -> None:
+def _validate_invite(invite: OrganizationInvite, now: datetime) -> None:
     """Validate that an invite is still usable (not expired, not accepted)."""
-    if invite.expires_at < datetime.now(timezone.utc):
+    if invite.expires_at < now:
         raise HTTPException(status_code=400, detail="Invite has expired")
     if invite.accepted_at is not None:
         raise HTTPException(status_code=400, detail="Invite has already been accepted")
 
 
-async def _ensure_not_last_admin(org_id: UUID, db: AsyncSession, action: str = "demote") -> None:
-    """Raise 400 if there is only one admin left in the organization."""
-    admin_count_result = await db.execute(
-        select(func.count())
-        .select_from(OrganizationMember)
+async def _ensure_not_last_admin(
+    org_id: UUID, target_user_id: UUID, db: AsyncSession, action: str = "demote"
+) -> None:
+    """Raise 400 unless another admin besides the target remains in the organization.
+
+    Locks the other admin row found, so two admins cannot demote each other
+    concurrently and leave the organization without one.
+    """
+    other_admin = await db.execute(
+        select(OrganizationMember.id)
         .where(
             OrganizationMember.organization_id == org_id,
             OrganizationMember.role == "admin",
+            OrganizationMember.user_id != target_user_id,
         )
+        .limit(1)
         .with_for_update()
     )
-    admin_count = admin_count_result.scalar() or 0
-    if admin_count <= 1:
+    if other_admin.scalar_one_or_none() is None:
         raise HTTPException(status_code=400, detail=f"Cannot {action} the last admin")
 
 
@@ -120,19 +198,13 @@ async def create_organization(
     """Create a new organization. User must not already belong to an org."""
     # Check if user already belongs to an org
     existing = await db.execute(
-        select(OrganizationMember).where(OrganizationMember.user_id == user.id)
+        select(exists().where(OrganizationMember.user_id == user.id))
     )
-    if existing.scalars().first():
+    if existing.scalar():
         raise HTTPException(status_code=400, detail="Cannot create organization at this time")
 
-    # Generate unique slug
-    base_slug = generate_slug(data.name)
-    slug = await ensure_unique_slug(base_slug, db)
-
-    # Create org
-    org = Organization(name=data.name, slug=slug)
-    db.add(org)
-    await db.flush()
+    # Create org under a unique slug
+    org = await _insert_org_with_unique_slug(db, data.name, generate_slug(data.name))
 
     # Add creator as admin
     member = OrganizationMember(
@@ -142,9 +214,9 @@ async def create_organization(
     )
     db.add(member)
     await db.commit()
-    await db.refresh(org)
 
-    return await build_org_response(org, db)
+    # RETURNING already loaded the timestamps and the creator is the only member
+    return build_org_response(org, 1)
 
 
 @router.get("", response_model=OrganizationResponse)
@@ -153,11 +225,11 @@ async def get_organization(
     db: AsyncSession = Depends(get_db),
 ):
     """Get current user's organization with member count."""
-    org = await db.get(Organization, membership.organization_id)
-    if not org:
+    org_with_count = await _fetch_org_with_member_count(db, membership.organization_id)
+    if not org_with_count:
         raise HTTPException(status_code=404, detail="Organization not found")
 
-    return await build_org_response(org, db)
+    return build_org_response(*org_with_count)
 
 
 @router.put("", response_model=OrganizationResponse)
@@ -167,21 +239,25 @@ async def update_organization(
     db: AsyncSession = Depends(get_db),
 ):
     """Update organization name (admin only). Auto-regenerates slug."""
-    org = await db.get(Organization, membership.organization_id)
-    if not org:
+    org_with_count = await _fetch_org_with_member_count(db, membership.organization_id)
+    if not org_with_count:
         raise HTTPException(status_code=404, detail="Organization not found")
+    org, member_count = org_with_count
 
+    token_hashes = []
     if data.name is not None:
         org.name = data.name
         # Regenerate slug
         base_slug = generate_slug(data.name)
         org.slug = await ensure_unique_slug(base_slug, db, exclude_id=org.id)
+        # Cached invite landing pages show the org name
+        token_hashes = await _pending_invite_token_hashes(org.id, db)
 
     org.updated_at = datetime.now(timezone.utc)
     await db.commit()
-    await db.refresh(org)
+    _evict_invite_info(token_hashes)
 
-    return await build_org_response(org, db)
+    return build_org_response(org, member_count)
 
 
 @router.delete("", status_code=204)
@@ -194,8 +270,12 @@ async def delete_organization(
     if not org:
         raise HTTPException(status_code=404, detail="Organization not found")
 
+    # Read before the delete cascades the invites away
+    token_hashes = await _pending_invite_token_hashes(org.id, db)
     await db.delete(org)
     await db.commit()
+    invalidate_org_stats(membership.organization_id)
+    _evict_invite_info(token_hashes)
 
 
 # --- Team Management ---
@@ -207,22 +287,18 @@ async def list_members(
 ):
     """List all organization members with trip counts."""
     # Single query: members + user info + trip count via LEFT JOIN + GROUP BY
-    trip_count_sub = (
-        select(Trip.user_id, func.count(Trip.id).label("trip_count"))
-        .where(Trip.organization_id == membership.organization_id)
-        .group_by(Trip.user_id)
-        .subquery()
-    )
-
     result = await db.execute(
-        select(
-            OrganizationMember,
-            User,
-            func.coalesce(trip_count_sub.c.trip_count, 0).label("trip_count"),
-        )
+        select(OrganizationMember, User, func.count(Trip.id).label("trip_count"))
         .join(User, OrganizationMember.user_id == User.id)
-        .outerjoin(trip_count_sub, OrganizationMember.user_id == trip_count_sub.c.user_id)
+        .outerjoin(
+            Trip,
+            and_(
+                Trip.user_id == OrganizationMember.user_id,
+                Trip.organization_id == membership.organization_id,
+            ),
+        )
         .where(OrganizationMember.organization_id == membership.organization_id)
+        .group_by(OrganizationMember.id, User.id)
         .order_by(OrganizationMember.created_at)
     )
     rows = result.all()
@@ -265,11 +341,10 @@ async def update_member_role(
 
     # If demoting from admin, check if they're the last admin
     if target_member.role == "admin" and data.role != "admin":
-        await _ensure_not_last_admin(membership.organization_id, db)
+        await _ensure_not_last_admin(membership.organization_id, user_id, db)
 
     target_member.role = data.role
     await db.commit()
-    await db.refresh(target_member)
 
     # Get trip count in single query
     trip_count = (await db.execute(
@@ -322,16 +397,17 @@ async def remove_member(
 
     # Check if removing last admin
     if target_member.role == "admin":
-        await _ensure_not_last_admin(membership.organization_id, db, action="remove")
+        await _ensure_not_last_admin(membership.organization_id, user_id, db, action="remove")
 
     await db.delete(target_member)
     await db.commit()
+    invalidate_org_stats(membership.organization_id)
 
 
 # --- Invites ---
 
 @router.post("/invites", response_model=InviteResponse, status_code=201)
-@limiter.limit("10/hour")
+@limiter.limit("10/hour", key_func=user_or_ip_key)
 async def create_invite(
     request: Request,
     data: InviteCreate,
@@ -342,14 +418,15 @@ async def create_invite(
     # Check if email is already a member (case-insensitive)
     # Note: data.email is already normalized to lowercase by InviteCreate validator
     existing_member = await db.execute(
-        select(OrganizationMember)
-        .join(User, OrganizationMember.user_id == User.id)
-        .where(
-            OrganizationMember.organization_id == membership.organization_id,
-            func.lower(User.email) == data.email,
+        select(
+            exists().where(
+                OrganizationMember.user_id == User.id,
+                OrganizationMember.organization_id == membership.organization_id,
+                func.lower(User.email) == data.email,
+            )
         )
     )
-    if existing_member.scalars().first():
+    if existing_member.scalar():
         raise HTTPException(status_code=409, detail="User is already a member")
 
     # Create invite
@@ -360,19 +437,21 @@ async def create_invite(
         organization_id=membership.organization_id,
         email=data.email,
         role=data.role,
-        token=token,
+        token_hash=hash_token(token),
         expires_at=expires_at,
     )
     db.add(invite)
     await db.commit()
-    await db.refresh(invite)
 
     # Send invite email
     org = await db.get(Organization, membership.organization_id)
     org_name = org.name if org else "an organization"
     await send_invite_email(data.email, org_name, data.role, token)
 
-    return invite
+    # The raw token only exists in this response and the email
+    response = InviteResponse.model_validate(invite)
+    response.token = token
+    return response
 
 
 @router.get("/invites", response_model=list[InviteResponse])
@@ -382,8 +461,17 @@ async def list_invites(
 ):
     """List pending (non-expired, non-accepted) invites (admin only)."""
     now = datetime.now(timezone.utc)
+    # Only the response columns: nothing here can trigger a lazy load of
+    # OrganizationInvite.organization, and token_hash never leaves the DB.
     result = await db.execute(
-        select(OrganizationInvite)
+        select(
+            OrganizationInvite.id,
+            OrganizationInvite.email,
+            OrganizationInvite.role,
+            OrganizationInvite.expires_at,
+            OrganizationInvite.created_at,
+            OrganizationInvite.accepted_at,
+        )
         .where(
             OrganizationInvite.organization_id == membership.organization_id,
             OrganizationInvite.accepted_at.is_(None),
@@ -391,7 +479,7 @@ async def list_invites(
         )
         .order_by(OrganizationInvite.created_at.desc())
     )
-    return result.scalars().all()
+    return [InviteResponse(**row._mapping) for row in result]
 
 
 @router.delete("/invites/{invite_id}", status_code=204)
@@ -407,6 +495,7 @@ async def revoke_invite(
 
     await db.delete(invite)
     await db.commit()
+    _invite_info_cache.pop(invite.token_hash)
 
 
 @router.post("/invites/{token}/accept", response_model=OrganizationResponse)
@@ -418,20 +507,21 @@ async def accept_invite(
     """Accept an invite (any logged-in user). User must not already belong to an org."""
     # Check if user already belongs to an org
     existing = await db.execute(
-        select(OrganizationMember).where(OrganizationMember.user_id == user.id)
+        select(exists().where(OrganizationMember.user_id == user.id))
     )
-    if existing.scalars().first():
+    if existing.scalar():
         raise HTTPException(status_code=409, detail="You are already a member of an organization")
 
     # Find invite
     result = await db.execute(
-        select(OrganizationInvite).where(OrganizationInvite.token == token)
+        select(OrganizationInvite).where(OrganizationInvite.token_hash == hash_token(token))
     )
     invite = result.scalars().first()
     if not invite:
         raise HTTPException(status_code=404, detail="Invite not found")
 
-    _validate_invite(invite)
+    now = datetime.now(timezone.utc)
+    _validate_invite(invite, now)
 
     # Check email match (case-insensitive)
     # Normalize both emails to lowercase for comparison
@@ -447,15 +537,17 @@ async def accept_invite(
     db.add(member)
 
     # Mark invite as accepted
-    invite.accepted_at = datetime.now(timezone.utc)
+    invite.accepted_at = now
 
     await db.commit()
+    invalidate_org_stats(invite.organization_id)
+    _invite_info_cache.pop(invite.token_hash)
 
-    org = await db.get(Organization, invite.organization_id)
-    if not org:
+    org_with_count = await _fetch_org_with_member_count(db, invite.organization_id)
+    if not org_with_count:
         raise HTTPException(status_code=404, detail="Organization not found")
 
-    return await build_org_response(org, db)
+    return build_org_response(*org_with_count)
 
 
 # --- Public Invite Info ---
@@ -468,23 +560,34 @@ async def get_invite_info(
     db: AsyncSession = Depends(get_db),
 ):
     """Public endpoint to get invite info for the landing page. No auth required."""
+    token_hash = hash_token(token)
+    cached = _invite_info_cache.get(token_hash)
+    if cached is not None:
+        return cached
+
     result = await db.execute(
-        select(OrganizationInvite).where(OrganizationInvite.token == token)
+        select(OrganizationInvite)
+        .options(joinedload(OrganizationInvite.organization))
+        .where(OrganizationInvite.token_hash == token_hash)
     )
     invite = result.scalars().first()
     if not invite:
         raise HTTPException(status_code=404, detail="Invite not found")
 
-    _validate_invite(invite)
+    now = datetime.now(timezone.utc)
+    _validate_invite(invite, now)
 
-    org = await db.get(Organization, invite.organization_id)
+    org = invite.organization
     org_name = org.name if org else "Unknown"
 
-    return {
+    info = {
         "org_name": org_name,
         "role": invite.role,
         "email": invite.email,
     }
+    remaining = (invite.expires_at - now).total_seconds()
+    _invite_info_cache.set(token_hash, info, ttl=min(remaining, INVITE_INFO_TTL_SECONDS))
+    return info
 
 
 # --- Admin Views ---
@@ -496,26 +599,22 @@ async def list_org_trips(
 ):
     """List all trips in the organization (admin only). Ordered by created_at desc."""
     result = await db.execute(
-        select(Trip, User)
+        select(
+            Trip.id,
+            Trip.name,
+            Trip.country_code,
+            Trip.status,
+            Trip.start_date,
+            Trip.end_date,
+            Trip.created_at,
+            User.email.label("designer_email"),
+        )
         .join(User, Trip.user_id == User.id)
         .where(Trip.organization_id == membership.organization_id)
         .order_by(Trip.created_at.desc())
     )
-    trips_with_users = result.all()
 
-    return [
-        OrgTripResponse(
-            id=trip.id,
-            name=trip.name,
-            country_code=trip.country_code,
-            status=trip.status,
-            start_date=trip.start_date,
-            end_date=trip.end_date,
-            created_at=trip.created_at,
-            designer_email=user.email,
-        )
-        for trip, user in trips_with_users
-    ]
+    return [OrgTripResponse(**row._mapping) for row in result]
 
 
 @router.get("/stats", response_model=OrgStatsResponse)
@@ -523,7 +622,11 @@ async def get_org_stats(
     membership: OrganizationMember = Depends(require_org_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get organization stats (admin only)."""
+    """Get organization stats (admin only). Cached for ORG_STATS_TTL_SECONDS."""
+    cached = _org_stats_cache.get(membership.organization_id)
+    if cached is not None:
+        return cached
+
     # Total trips
     total_trips_result = await db.execute(
         select(func.count())
@@ -562,9 +665,11 @@ async def get_org_stats(
     )
     trips_by_status = {row[0]: row[1] for row in trips_by_status_result.all()}
 
-    return OrgStatsResponse(
+    stats = OrgStatsResponse(
         total_trips=total_trips,
         total_members=total_members,
         trips_by_designer=trips_by_designer,
         trips_by_status=trips_by_status,
     )
+    _org_stats_cache.set(membership.organization_id, stats)
+    return stats
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth import hash_password
+from app.auth import hash_password_async
 from app.database import get_db
 from app.dependencies import limiter
 from app.email import send_password_reset_email
@@ -66,15 +66,16 @@ async def reset_password(
         raise HTTPException(status_code=400, detail="Invalid or expired reset token")
     if reset_token.used_at is not None:
         raise HTTPException(status_code=400, detail="This reset link has already been used")
-    if reset_token.expires_at < datetime.now(timezone.utc):
+    now = datetime.now(timezone.utc)
+    if reset_token.expires_at < now:
         raise HTTPException(status_code=400, detail="This reset link has expired")
 
     user = await db.get(User, reset_token.user_id)
     if not user:
         raise HTTPException(status_code=400, detail="Invalid or expired reset token")
 
-    user.hashed_password = hash_password(data.new_password)
-    reset_token.used_at = datetime.now(timezone.utc)
+    user.hashed_password = await hash_password_async(data.new_password)
+    reset_token.used_at = now
     await db.commit()
 
     return {"status": "password_reset"}
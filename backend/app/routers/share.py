@@ -1,21 +1,29 @@
+import hashlib
 import secrets
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy import delete, select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import delete, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import get_current_user
 from app.database import get_db
-from app.dependencies import limiter, load_itinerary, verify_trip_ownership
+from app.dependencies import (
+    SHARED_TRIP_TTL_SECONDS,
+    cache_shared_trip,
+    invalidate_shared_trip,
+    limiter,
+    load_itinerary,
+    shared_trip_cache,
+    shared_trip_generation,
+    trip_owned_by,
+    user_or_ip_key,
+    verify_trip_ownership_exists,
+)
 from app.models import ShareToken, Trip, User
 from app.routers.trips import compute_budget
-from app.schemas import (
-    ItineraryStopResponse,
-    ShareTokenResponse,
-    SharedTripResponse,
-)
+from app.schemas import ShareTokenResponse, SharedTripResponse
 
 router = APIRouter(tags=["share"])
 
@@ -23,34 +31,36 @@ TOKEN_EXPIRY_HOURS = 24
 
 
 @router.post("/trips/{trip_id}/share", response_model=ShareTokenResponse, status_code=201)
-@limiter.limit("5/minute")
+@limiter.limit("5/minute", key_func=user_or_ip_key)
 async def create_share_token(
     request: Request,
     trip_id: UUID,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
-
-    # Delete old tokens for this trip
-    await db.execute(
-        delete(ShareToken).where(ShareToken.trip_id == trip_id)
-    )
+    await verify_trip_ownership_exists(trip_id, user, db)
+    now = datetime.now(timezone.utc)
 
-    # Clean up expired tokens from other trips (opportunistic cleanup)
+    # Delete old tokens for this trip, and expired tokens from other trips
+    # (opportunistic cleanup), in one statement
     await db.execute(
-        delete(ShareToken).where(ShareToken.expires_at < datetime.now(timezone.utc))
+        delete(ShareToken).where(
+            or_(
+                ShareToken.trip_id == trip_id,
+                ShareToken.expires_at < now,
+            )
+        )
     )
 
     token = ShareToken(
         trip_id=trip_id,
         user_id=user.id,
         token=secrets.token_urlsafe(32),
-        expires_at=datetime.now(timezone.utc) + timedelta(hours=TOKEN_EXPIRY_HOURS),
+        expires_at=now + timedelta(hours=TOKEN_EXPIRY_HOURS),
     )
     db.add(token)
     await db.commit()
-    await db.refresh(token)
+    invalidate_shared_trip(trip_id)
     return token
 
 
@@ -60,7 +70,7 @@ async def get_share_token(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
+    await verify_trip_ownership_exists(trip_id, user, db)
 
     result = await db.execute(
         select(ShareToken).where(
@@ -80,53 +90,86 @@ async def revoke_share_token(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
-
-    await db.execute(
-        delete(ShareToken).where(ShareToken.trip_id == trip_id)
+    # Ownership check and delete in one statement; only look at the trip
+    # separately when nothing was deleted, to tell "no link" from "not yours"
+    result = await db.execute(
+        delete(ShareToken)
+        .where(ShareToken.trip_id == trip_id, trip_owned_by(trip_id, user))
+        .returning(ShareToken.id)
     )
+    if not result.first():
+        await verify_trip_ownership_exists(trip_id, user, db)
     await db.commit()
+    invalidate_shared_trip(trip_id)
 
 
-@router.get("/shared/{token}", response_model=SharedTripResponse)
-@limiter.limit("30/minute")
-async def get_shared_trip(
-    request: Request,
-    token: str,
-    db: AsyncSession = Depends(get_db),
-):
+async def _render_shared_trip(token: str, db: AsyncSession) -> tuple[str, bytes]:
+    """Build, serialize and cache the public view of a shared trip."""
+    generation = shared_trip_generation()
+    now = datetime.now(timezone.utc)
+    # Token check and trip in one statement; unknown and expired tokens look the same
     result = await db.execute(
-        select(ShareToken).where(ShareToken.token == token)
+        select(ShareToken.expires_at, Trip)
+        .join(Trip, Trip.id == ShareToken.trip_id)
+        .where(
+            ShareToken.token == token,
+            ShareToken.expires_at > now,
+        )
     )
-    share_token = result.scalars().first()
-
-    if not share_token or share_token.expires_at < datetime.now(timezone.utc):
-        raise HTTPException(status_code=404, detail="Share link not found or expired")
-
-    trip = await db.get(Trip, share_token.trip_id)
-    if not trip:
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Share link not found or expired")
+    expires_at, trip = row
 
     stops, movements, all_activities, movement_by_from, activities_by_stop = await load_itinerary(trip.id, db)
 
+    # Plain dicts of ORM objects, validated in the single model_validate below
     itinerary_stops = [
-        ItineraryStopResponse(
-            stop=stop,
-            activities=activities_by_stop.get(stop.id, []),
-            movement_to_next=movement_by_from.get(stop.id),
-        )
+        {
+            "stop": stop,
+            "activities": activities_by_stop.get(stop.id, []),
+            "movement_to_next": movement_by_from.get(stop.id),
+        }
         for stop in stops
     ]
 
     budget = compute_budget(stops, all_activities, movements)
-    return SharedTripResponse(
-        trip_name=trip.name,
-        country_code=trip.country_code,
-        start_date=trip.start_date,
-        end_date=trip.end_date,
-        status=trip.status,
-        currency=trip.currency,
-        stops=itinerary_stops,
-        budget=budget,
-        expires_at=share_token.expires_at,
+    response = SharedTripResponse.model_validate(
+        {
+            "trip_name": trip.name,
+            "country_code": trip.country_code,
+            "start_date": trip.start_date,
+            "end_date": trip.end_date,
+            "status": trip.status,
+            "currency": trip.currency,
+            "stops": itinerary_stops,
+            "budget": budget,
+            "expires_at": expires_at,
+        },
+        from_attributes=True,
     )
+    body = response.model_dump_json().encode()
+    entry = (f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+    # Never serve the cached view past the link's own expiry
+    ttl = min(SHARED_TRIP_TTL_SECONDS, (expires_at - now).total_seconds())
+    cache_shared_trip(token, trip.id, entry, ttl, generation)
+    return entry
+
+
+@router.get("/shared/{token}", response_model=SharedTripResponse)
+@limiter.limit("30/minute")
+async def get_shared_trip(
+    request: Request,
+    token: str,
+    db: AsyncSession = Depends(get_db),
+):
+    entry = shared_trip_cache.get(token)
+    if entry is None:
+        entry = await _render_shared_trip(token, db)
+    etag, body = entry
+
+    # no-cache: browsers keep the body but revalidate, so revoked links stop working
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
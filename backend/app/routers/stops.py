@@ -2,12 +2,18 @@ from datetime import timedelta
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import delete, func, select, text
+from sqlalchemy import case, delete, func, lambda_stmt, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.auth import get_current_user
 from app.database import get_db
-from app.dependencies import verify_stop_ownership, verify_trip_ownership
+from app.dependencies import (
+    invalidate_shared_trip,
+    verify_stop_ownership,
+    verify_trip_ownership,
+    verify_trip_ownership_exists,
+)
 from app.models import Activity, Movement, Trip, TripStop, User
 from app.schemas import TripStopCreate, TripStopReorder, TripStopResponse, TripStopUpdate
 
@@ -31,11 +37,13 @@ async def list_stops(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
+    await verify_trip_ownership_exists(trip_id, user, db)
     result = await db.execute(
-        select(TripStop)
-        .where(TripStop.trip_id == trip_id)
-        .order_by(TripStop.sort_index)
+        lambda_stmt(
+            lambda: select(TripStop)
+            .where(TripStop.trip_id == trip_id)
+            .order_by(TripStop.sort_index)
+        )
     )
     return result.scalars().all()
 
@@ -71,7 +79,7 @@ async def create_stop(
     await db.flush()
     await recalculate_end_date(trip_id, db)
     await db.commit()
-    await db.refresh(stop)
+    invalidate_shared_trip(trip_id)
     return stop
 
 
@@ -94,6 +102,7 @@ async def update_stop(
         await recalculate_end_date(stop.trip_id, db)
 
     await db.commit()
+    invalidate_shared_trip(stop.trip_id)
     await db.refresh(stop)
     return stop
 
@@ -124,18 +133,22 @@ async def delete_stop(
     # Defer unique constraint for renumbering
     await db.execute(text("SET CONSTRAINTS uq_trip_stop_sort DEFERRED"))
 
-    # Renumber remaining stops
-    result = await db.execute(
-        select(TripStop)
+    # Renumber remaining stops 0, 1, 2... in one statement
+    ranked = (
+        select(TripStop.id, (func.row_number().over(order_by=TripStop.sort_index) - 1).label("new_index"))
         .where(TripStop.trip_id == trip_id)
-        .order_by(TripStop.sort_index)
+        .subquery()
+    )
+    await db.execute(
+        update(TripStop)
+        .where(TripStop.id == ranked.c.id, TripStop.sort_index != ranked.c.new_index)
+        .values(sort_index=ranked.c.new_index)
+        .execution_options(synchronize_session=False)
     )
-    remaining = result.scalars().all()
-    for i, s in enumerate(remaining):
-        s.sort_index = i
 
     await recalculate_end_date(trip_id, db)
     await db.commit()
+    invalidate_shared_trip(trip_id)
 
 
 @router.put("/trips/{trip_id}/stops/reorder", response_model=list[TripStopResponse])
@@ -145,7 +158,7 @@ async def reorder_stops(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
+    await verify_trip_ownership_exists(trip_id, user, db)
 
     # Load all stops for this trip sorted by sort_index
     result = await db.execute(
@@ -165,17 +178,25 @@ async def reorder_stops(
     # Defer unique constraint for renumbering
     await db.execute(text("SET CONSTRAINTS uq_trip_stop_sort DEFERRED"))
 
-    # Renumber 0, 1, 2...
-    for i, stop in enumerate(stops):
-        stop.sort_index = i
+    # Renumber 0, 1, 2... in one statement. The loaded objects are updated in
+    # place without being marked dirty, so nothing is flushed or re-fetched.
+    new_index = {stop.id: i for i, stop in enumerate(stops)}
+    result = await db.execute(
+        update(TripStop)
+        .where(TripStop.trip_id == trip_id)
+        .values(sort_index=case(new_index, value=TripStop.id))
+        .returning(TripStop.id, TripStop.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    updated_at = dict(result.tuples().all())
+    for stop in stops:
+        set_committed_value(stop, "sort_index", new_index[stop.id])
+        set_committed_value(stop, "updated_at", updated_at[stop.id])
 
     # Delete ALL movements for this trip
     await db.execute(delete(Movement).where(Movement.trip_id == trip_id))
 
     await db.commit()
-
-    # Refresh to return updated data
-    for stop in stops:
-        await db.refresh(stop)
+    invalidate_shared_trip(trip_id)
 
     return stops
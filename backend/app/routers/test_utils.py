@@ -4,7 +4,8 @@ from fastapi import APIRouter, Depends, Header, HTTPException
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth import create_access_token, create_refresh_token, hash_password
+from app.auth import create_access_token, create_refresh_token, hash_password_async
+from app.cache import clear_caches
 from app.database import get_db
 from app.models import User
 
@@ -27,8 +28,12 @@ async def reset_database(
     _: None = Depends(_verify_test_secret),
 ):
     """Truncate all tables in FK-safe order. Only available when TESTING=true."""
+    # Throwaway test data: don't wait for the WAL flush on commit
+    await db.execute(text("SET LOCAL synchronous_commit = off"))
     await db.execute(text("TRUNCATE activities, movements, trip_stops, trips, users CASCADE"))
     await db.commit()
+    # Cached org stats, invite info and verified tokens refer to deleted rows
+    clear_caches()
     return {"status": "reset"}
 
 
@@ -39,10 +44,9 @@ async def create_test_user(
 ):
     """Create a test user and return tokens. Only available when TESTING=true."""
     email = f"test-{uuid.uuid4().hex[:8]}@test.com"
-    user = User(email=email, hashed_password=hash_password("testpass123"))
+    user = User(email=email, hashed_password=await hash_password_async("testpass123"))
     db.add(user)
     await db.commit()
-    await db.refresh(user)
 
     access_token = create_access_token(str(user.id))
     refresh_token = create_refresh_token(str(user.id))
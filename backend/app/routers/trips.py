@@ -1,19 +1,25 @@
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from sqlalchemy import func, lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
 from app.auth import get_current_user
 from app.database import get_db
-from app.dependencies import load_itinerary, verify_trip_ownership
-from app.models import Trip, User
+from app.dependencies import (
+    invalidate_shared_trip,
+    load_itinerary_if_owned,
+    verify_trip_ownership,
+    verify_trip_ownership_exists,
+)
+from app.models import Activity, Movement, Trip, TripStop, User
 from app.permissions import get_org_membership
+from app.routers.org import invalidate_org_stats
 from app.routers.stops import recalculate_end_date
 from app.schemas import (
     BudgetSummary,
     ItineraryResponse,
-    ItineraryStopResponse,
     TripCreate,
     TripResponse,
     TripUpdate,
@@ -34,13 +40,57 @@ def compute_budget(stops, activities, movements):
     )
 
 
+async def load_budget(trip_id: UUID, db: AsyncSession) -> BudgetSummary:
+    """Sum a trip's budget in Postgres instead of loading every row.
+
+    Use compute_budget when the stops, activities and movements are already
+    loaded (the itinerary endpoints); this is for callers that only need totals.
+    """
+    activities_total = (
+        select(func.coalesce(func.sum(Activity.price), 0))
+        .join(TripStop, Activity.trip_stop_id == TripStop.id)
+        .where(TripStop.trip_id == trip_id)
+        .scalar_subquery()
+    )
+    accommodation_total = (
+        select(func.coalesce(func.sum(TripStop.price_per_night * TripStop.nights), 0))
+        .where(TripStop.trip_id == trip_id)
+        .scalar_subquery()
+    )
+    transport_total = (
+        select(func.coalesce(func.sum(Movement.price), 0))
+        .where(Movement.trip_id == trip_id)
+        .scalar_subquery()
+    )
+    row = (await db.execute(select(activities_total, accommodation_total, transport_total))).one()
+    activities, accommodation, transport = (float(total) for total in row)
+    return BudgetSummary(
+        activities_total=activities,
+        accommodation_total=accommodation,
+        transport_total=transport,
+        grand_total=activities + accommodation + transport,
+    )
+
+
 @router.get("", response_model=list[TripResponse])
 async def list_trips(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    # TripResponse reads every column except the two foreign keys; skip those.
+    user_id = user.id
     result = await db.execute(
-        select(Trip).where(Trip.user_id == user.id).order_by(Trip.created_at.desc())
+        lambda_stmt(
+            lambda: select(Trip)
+            .options(
+                load_only(
+                    Trip.id, Trip.name, Trip.country_code, Trip.start_date, Trip.end_date,
+                    Trip.status, Trip.notes, Trip.currency, Trip.created_at, Trip.updated_at,
+                )
+            )
+            .where(Trip.user_id == user_id)
+            .order_by(Trip.created_at.desc())
+        )
     )
     return result.scalars().all()
 
@@ -75,7 +125,7 @@ async def create_trip(
     )
     db.add(trip)
     await db.commit()
-    await db.refresh(trip)
+    invalidate_org_stats(organization_id)
     return trip
 
 
@@ -108,6 +158,8 @@ async def update_trip(
         await recalculate_end_date(trip_id, db)
 
     await db.commit()
+    invalidate_org_stats(trip.organization_id)
+    invalidate_shared_trip(trip_id)
     await db.refresh(trip)
     return trip
 
@@ -121,6 +173,18 @@ async def delete_trip(
     trip = await verify_trip_ownership(trip_id, user, db)
     await db.delete(trip)
     await db.commit()
+    invalidate_org_stats(trip.organization_id)
+    invalidate_shared_trip(trip_id)
+
+
+@router.get("/{trip_id}/budget", response_model=BudgetSummary)
+async def get_budget(
+    trip_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    await verify_trip_ownership_exists(trip_id, user, db)
+    return await load_budget(trip_id, db)
 
 
 @router.get("/{trip_id}/itinerary", response_model=ItineraryResponse)
@@ -129,18 +193,22 @@ async def get_itinerary(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    trip = await verify_trip_ownership(trip_id, user, db)
-
-    stops, movements, all_activities, movement_by_from, activities_by_stop = await load_itinerary(trip_id, db)
+    loaded = await load_itinerary_if_owned(trip_id, user, db)
+    if loaded is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    trip, stops, movements, all_activities, movement_by_from, activities_by_stop = loaded
 
+    # Plain dicts of ORM objects, validated in the single model_validate below
     itinerary_stops = [
-        ItineraryStopResponse(
-            stop=stop,
-            activities=activities_by_stop.get(stop.id, []),
-            movement_to_next=movement_by_from.get(stop.id),
-        )
+        {
+            "stop": stop,
+            "activities": activities_by_stop.get(stop.id, []),
+            "movement_to_next": movement_by_from.get(stop.id),
+        }
         for stop in stops
     ]
 
     budget = compute_budget(stops, all_activities, movements)
-    return ItineraryResponse(trip=trip, stops=itinerary_stops, budget=budget)
+    return ItineraryResponse.model_validate(
+        {"trip": trip, "stops": itinerary_stops, "budget": budget}, from_attributes=True
+    )
@@ -1,14 +1,18 @@
-import uuid as uuid_mod
-from uuid import UUID
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import delete, func, select
+import os
+from collections.abc import Iterator
+from datetime import date, datetime, time
+from uuid import UUID, uuid4
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import and_, delete, exists, func, insert, literal, literal_column, select
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased
 
 from app.auth import get_current_user
+from app.cache import TTLCache
 from app.database import get_db
-from app.dependencies import verify_trip_ownership
+from app.dependencies import invalidate_shared_trip, verify_trip_ownership, verify_trip_ownership_exists
 from app.models import Activity, ActivityPhoto, Movement, TripStop, TripVersion, User
 from app.routers.stops import recalculate_end_date
 from app.schemas import (
@@ -20,147 +24,189 @@ from app.schemas import (
 router = APIRouter(prefix="/trips/{trip_id}/versions", tags=["versions"])
 
 
-async def _build_snapshot(trip_id: UUID, db: AsyncSession) -> dict:
-    """Serialize the current trip state (stops, activities, photos, movements) to a dict."""
-    stops_result = await db.execute(
-        select(TripStop)
-        .where(TripStop.trip_id == trip_id)
-        .order_by(TripStop.sort_index)
-    )
-    stops = stops_result.scalars().all()
-    stop_ids = [s.id for s in stops]
-
-    # Load activities with photos
-    if stop_ids:
-        activities_result = await db.execute(
-            select(Activity)
-            .options(selectinload(Activity.photos))
-            .where(Activity.trip_stop_id.in_(stop_ids))
-            .order_by(Activity.sort_index)
-        )
-        all_activities = activities_result.scalars().all()
-    else:
-        all_activities = []
+# The columns VersionMetaResponse is built from
+_VERSION_META_COLUMNS = (
+    TripVersion.id,
+    TripVersion.trip_id,
+    TripVersion.version_number,
+    TripVersion.label,
+    TripVersion.created_at,
+)
 
-    # Load movements
-    movements_result = await db.execute(
-        select(Movement).where(Movement.trip_id == trip_id)
-    )
-    movements = movements_result.scalars().all()
-
-    # Build activities grouped by stop
-    activities_by_stop: dict[UUID, list] = {}
-    for a in all_activities:
-        activities_by_stop.setdefault(a.trip_stop_id, []).append(a)
-
-    stops_data = []
-    for stop in stops:
-        stop_activities = activities_by_stop.get(stop.id, [])
-        activities_data = []
-        for act in stop_activities:
-            photos_data = [
-                {
-                    "url": p.url,
-                    "thumbnail_url": p.thumbnail_url,
-                    "attribution": p.attribution,
-                    "photographer_name": p.photographer_name,
-                    "photographer_url": p.photographer_url,
-                    "source": p.source,
-                    "width": p.width,
-                    "height": p.height,
-                    "sort_index": p.sort_index,
-                }
-                for p in act.photos
-            ]
-            activities_data.append({
-                "sort_index": act.sort_index,
-                "title": act.title,
-                "date": act.date.isoformat() if act.date else None,
-                "start_time": act.start_time.isoformat() if act.start_time else None,
-                "duration_minutes": act.duration_minutes,
-                "lng": act.lng,
-                "lat": act.lat,
-                "address": act.address,
-                "notes": act.notes,
-                "category": act.category,
-                "opening_hours": act.opening_hours,
-                "price": act.price,
-                "tips": act.tips,
-                "website_url": act.website_url,
-                "phone": act.phone,
-                "rating": act.rating,
-                "guide_info": act.guide_info,
-                "transport_info": act.transport_info,
-                "opentripmap_xid": act.opentripmap_xid,
-                "photos": photos_data,
-            })
+# Versions are never updated once created, so the detail view (snapshot
+# included) is cached per version; delete_version drops the entry.
+VERSION_CACHE_TTL_SECONDS = 300
+_version_cache = TTLCache(maxsize=256, ttl=VERSION_CACHE_TTL_SECONDS)
+
+
+async def _load_version(trip_id: UUID, version_id: UUID, db: AsyncSession) -> VersionDetailResponse:
+    """Return a version of the trip with its decoded snapshot, from cache when possible."""
+    version = _version_cache.get(version_id)
+    if version is None:
+        row = await db.get(TripVersion, version_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Version not found")
+        version = VersionDetailResponse.model_validate(row)
+        _version_cache.set(version_id, version)
+    if version.trip_id != trip_id:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return version
 
-        stops_data.append({
-            "sort_index": stop.sort_index,
-            "name": stop.name,
-            "lng": stop.lng,
-            "lat": stop.lat,
-            "notes": stop.notes,
-            "nights": stop.nights,
-            "price_per_night": stop.price_per_night,
-            "activities": activities_data,
-        })
+
+def _uuid4_batch(count: int) -> Iterator[UUID]:
+    """Yield count random (version 4) UUIDs cut from a single os.urandom call."""
+    raw = os.urandom(16 * count)
+    for offset in range(0, len(raw), 16):
+        yield UUID(bytes=raw[offset:offset + 16], version=4)
+
+
+def _json_list(row, order_by, where):
+    """Correlated subquery aggregating jsonb_build_object(**row) rows into a JSON array."""
+    obj = func.jsonb_build_object(*(arg for key, col in row.items() for arg in (literal(key), col)))
+    agg = func.jsonb_agg(aggregate_order_by(obj, order_by)) if order_by is not None else func.jsonb_agg(obj)
+    return select(func.coalesce(agg, literal_column("'[]'::jsonb"))).where(where).scalar_subquery()
+
+
+def _snapshot_expr(trip_id: UUID):
+    """SQL expression serializing the current trip state (stops, activities, photos, movements).
+
+    Built entirely in PostgreSQL so create_version inserts the snapshot with
+    INSERT ... SELECT instead of loading every row and JSON-encoding it here.
+    """
+    photos = _json_list(
+        {
+            "url": ActivityPhoto.url,
+            "thumbnail_url": ActivityPhoto.thumbnail_url,
+            "attribution": ActivityPhoto.attribution,
+            "photographer_name": ActivityPhoto.photographer_name,
+            "photographer_url": ActivityPhoto.photographer_url,
+            "source": ActivityPhoto.source,
+            "width": ActivityPhoto.width,
+            "height": ActivityPhoto.height,
+            "sort_index": ActivityPhoto.sort_index,
+        },
+        ActivityPhoto.sort_index,
+        ActivityPhoto.activity_id == Activity.id,
+    )
+    activities = _json_list(
+        {
+            "sort_index": Activity.sort_index,
+            "title": Activity.title,
+            "date": Activity.date,
+            "start_time": Activity.start_time,
+            "duration_minutes": Activity.duration_minutes,
+            "lng": Activity.lng,
+            "lat": Activity.lat,
+            "address": Activity.address,
+            "notes": Activity.notes,
+            "category": Activity.category,
+            "opening_hours": Activity.opening_hours,
+            "price": Activity.price,
+            "tips": Activity.tips,
+            "website_url": Activity.website_url,
+            "phone": Activity.phone,
+            "rating": Activity.rating,
+            "guide_info": Activity.guide_info,
+            "transport_info": Activity.transport_info,
+            "opentripmap_xid": Activity.opentripmap_xid,
+            "photos": photos,
+        },
+        Activity.sort_index,
+        Activity.trip_stop_id == TripStop.id,
+    )
+    stops = _json_list(
+        {
+            "sort_index": TripStop.sort_index,
+            "name": TripStop.name,
+            "lng": TripStop.lng,
+            "lat": TripStop.lat,
+            "notes": TripStop.notes,
+            "nights": TripStop.nights,
+            "price_per_night": TripStop.price_per_night,
+            "activities": activities,
+        },
+        TripStop.sort_index,
+        TripStop.trip_id == trip_id,
+    )
 
     # Movements reference stops by sort_index for restore mapping
-    movements_data = []
-    stop_id_to_sort_index = {s.id: s.sort_index for s in stops}
-    for m in movements:
-        from_idx = stop_id_to_sort_index.get(m.from_stop_id)
-        to_idx = stop_id_to_sort_index.get(m.to_stop_id)
-        if from_idx is None or to_idx is None:
-            continue
-        movements_data.append({
-            "from_sort_index": from_idx,
-            "to_sort_index": to_idx,
-            "type": m.type,
-            "duration_minutes": m.duration_minutes,
-            "departure_time": m.departure_time.isoformat() if m.departure_time else None,
-            "arrival_time": m.arrival_time.isoformat() if m.arrival_time else None,
-            "carrier": m.carrier,
-            "booking_ref": m.booking_ref,
-            "notes": m.notes,
-            "price": m.price,
-        })
+    from_stop = aliased(TripStop)
+    to_stop = aliased(TripStop)
+    movements = _json_list(
+        {
+            "from_sort_index": from_stop.sort_index,
+            "to_sort_index": to_stop.sort_index,
+            "type": Movement.type,
+            "duration_minutes": Movement.duration_minutes,
+            "departure_time": Movement.departure_time,
+            "arrival_time": Movement.arrival_time,
+            "carrier": Movement.carrier,
+            "booking_ref": Movement.booking_ref,
+            "notes": Movement.notes,
+            "price": Movement.price,
+        },
+        None,
+        and_(
+            Movement.trip_id == trip_id,
+            from_stop.id == Movement.from_stop_id,
+            to_stop.id == Movement.to_stop_id,
+        ),
+    )
 
-    return {
-        "stops": stops_data,
-        "movements": movements_data,
-    }
+    return func.jsonb_build_object(literal("stops"), stops, literal("movements"), movements, type_=JSONB)
 
 
 @router.post("", response_model=VersionMetaResponse, status_code=201)
 async def create_version(
     trip_id: UUID,
     data: VersionCreate,
+    response: Response,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
+    await verify_trip_ownership_exists(trip_id, user, db)
 
-    # Auto-increment version_number
-    result = await db.execute(
-        select(func.coalesce(func.max(TripVersion.version_number), 0))
+    # Auto-increment version_number; both it and the snapshot are computed
+    # inside the INSERT rather than in separate round trips beforehand.
+    next_version = (
+        select(func.coalesce(func.max(TripVersion.version_number), 0) + 1)
         .where(TripVersion.trip_id == trip_id)
+        .scalar_subquery()
     )
-    max_version = result.scalar()
-    next_version = max_version + 1
-
-    snapshot = await _build_snapshot(trip_id, db)
+    snapshot = select(_snapshot_expr(trip_id).label("data")).cte("snapshot")
+    latest = (
+        select(TripVersion.label, TripVersion.snapshot_data)
+        .where(TripVersion.trip_id == trip_id)
+        .order_by(TripVersion.version_number.desc())
+        .limit(1)
+        .subquery()
+    )
+    # Saving the same label over an unchanged itinerary (a retry or double
+    # submit) must not write another copy of the snapshot.
+    unchanged = exists().where(latest.c.label == data.label, latest.c.snapshot_data == snapshot.c.data)
 
-    version = TripVersion(
-        trip_id=trip_id,
-        version_number=next_version,
-        label=data.label,
-        snapshot_data=snapshot,
+    # RETURNING hands back the generated metadata with the INSERT itself; the
+    # snapshot is left out so it never travels back from the database.
+    result = await db.execute(
+        insert(TripVersion)
+        .from_select(
+            ["id", "trip_id", "version_number", "label", "snapshot_data"],
+            select(literal(uuid4()), literal(trip_id), next_version, literal(data.label), snapshot.c.data)
+            .where(~unchanged),
+        )
+        .returning(*_VERSION_META_COLUMNS)
     )
-    db.add(version)
+    version = result.one_or_none()
+    if version is None:
+        response.status_code = 200
+        result = await db.execute(
+            select(*_VERSION_META_COLUMNS)
+            .where(TripVersion.trip_id == trip_id)
+            .order_by(TripVersion.version_number.desc())
+            .limit(1)
+        )
+        return result.one()
     await db.commit()
-    await db.refresh(version)
     return version
 
 
@@ -170,14 +216,16 @@ async def list_versions(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
+    await verify_trip_ownership_exists(trip_id, user, db)
 
+    # Plain rows of the metadata columns: no ORM instances to build, and
+    # snapshot_data (large, omitted from VersionMetaResponse) is never read
     result = await db.execute(
-        select(TripVersion)
+        select(*_VERSION_META_COLUMNS)
         .where(TripVersion.trip_id == trip_id)
         .order_by(TripVersion.version_number.desc())
     )
-    return result.scalars().all()
+    return result.all()
 
 
 @router.get("/{version_id}", response_model=VersionDetailResponse)
@@ -187,13 +235,8 @@ async def get_version(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
-
-    version = await db.get(TripVersion, version_id)
-    if not version or version.trip_id != trip_id:
-        raise HTTPException(status_code=404, detail="Version not found")
-
-    return version
+    await verify_trip_ownership_exists(trip_id, user, db)
+    return await _load_version(trip_id, version_id, db)
 
 
 @router.post("/{version_id}/restore", response_model=VersionMetaResponse, status_code=200)
@@ -206,111 +249,128 @@ async def restore_version(
     """Destructive restore: replaces current trip stops/activities/movements with snapshot data."""
     await verify_trip_ownership(trip_id, user, db)
 
-    version = await db.get(TripVersion, version_id)
-    if not version or version.trip_id != trip_id:
-        raise HTTPException(status_code=404, detail="Version not found")
-
+    version = await _load_version(trip_id, version_id, db)
     snapshot = version.snapshot_data
+    stops_data = snapshot.get("stops", [])
+    movements_data = snapshot.get("movements", [])
 
-    # Delete existing data: movements first (they reference stops), then stops cascade deletes activities
-    await db.execute(delete(Movement).where(Movement.trip_id == trip_id))
+    # Delete existing data in one statement: the foreign keys cascade from the
+    # stops to their activities, photos and the movements between them
     await db.execute(delete(TripStop).where(TripStop.trip_id == trip_id))
-    await db.flush()
+
+    # Build plain row dicts for Core bulk INSERTs (one executemany per table
+    # instead of a unit-of-work INSERT per object). UUIDs are generated here so
+    # child rows can reference their parents before anything is sent.
+    stops_rows: list[dict] = []
+    activities_rows: list[dict] = []
+    photos_rows: list[dict] = []
+    movements_rows: list[dict] = []
+    activity_count = sum(len(stop_data.get("activities", [])) for stop_data in stops_data)
+    photo_count = sum(
+        len(act_data.get("photos", []))
+        for stop_data in stops_data
+        for act_data in stop_data.get("activities", [])
+    )
+    new_ids = _uuid4_batch(len(stops_data) + activity_count + photo_count + len(movements_data))
 
     # Recreate stops with new UUIDs; build sort_index -> new_stop_id map for movements
     sort_index_to_stop_id: dict[int, UUID] = {}
-    for stop_data in snapshot.get("stops", []):
-        new_stop_id = uuid_mod.uuid4()
+    for stop_data in stops_data:
+        new_stop_id = next(new_ids)
         sort_index_to_stop_id[stop_data["sort_index"]] = new_stop_id
 
-        stop = TripStop(
-            id=new_stop_id,
-            trip_id=trip_id,
-            sort_index=stop_data["sort_index"],
-            name=stop_data["name"],
-            lng=stop_data["lng"],
-            lat=stop_data["lat"],
-            notes=stop_data.get("notes", ""),
-            nights=stop_data.get("nights", 1),
-            price_per_night=stop_data.get("price_per_night"),
-        )
-        db.add(stop)
+        stops_rows.append({
+            "id": new_stop_id,
+            "trip_id": trip_id,
+            "sort_index": stop_data["sort_index"],
+            "name": stop_data["name"],
+            "lng": stop_data["lng"],
+            "lat": stop_data["lat"],
+            "notes": stop_data.get("notes", ""),
+            "nights": stop_data.get("nights", 1),
+            "price_per_night": stop_data.get("price_per_night"),
+        })
 
         # Recreate activities for this stop
         for act_data in stop_data.get("activities", []):
-            from datetime import date, time
-
-            new_activity_id = uuid_mod.uuid4()
-            activity = Activity(
-                id=new_activity_id,
-                trip_stop_id=new_stop_id,
-                sort_index=act_data["sort_index"],
-                title=act_data["title"],
-                date=date.fromisoformat(act_data["date"]) if act_data.get("date") else None,
-                start_time=time.fromisoformat(act_data["start_time"]) if act_data.get("start_time") else None,
-                duration_minutes=act_data.get("duration_minutes"),
-                lng=act_data.get("lng"),
-                lat=act_data.get("lat"),
-                address=act_data.get("address", ""),
-                notes=act_data.get("notes", ""),
-                category=act_data.get("category", ""),
-                opening_hours=act_data.get("opening_hours", ""),
-                price=act_data.get("price"),
-                tips=act_data.get("tips", ""),
-                website_url=act_data.get("website_url", ""),
-                phone=act_data.get("phone", ""),
-                rating=act_data.get("rating"),
-                guide_info=act_data.get("guide_info", ""),
-                transport_info=act_data.get("transport_info", ""),
-                opentripmap_xid=act_data.get("opentripmap_xid", ""),
-            )
-            db.add(activity)
+            new_activity_id = next(new_ids)
+            activities_rows.append({
+                "id": new_activity_id,
+                "trip_stop_id": new_stop_id,
+                "sort_index": act_data["sort_index"],
+                "title": act_data["title"],
+                "date": date.fromisoformat(act_data["date"]) if act_data.get("date") else None,
+                "start_time": time.fromisoformat(act_data["start_time"]) if act_data.get("start_time") else None,
+                "duration_minutes": act_data.get("duration_minutes"),
+                "lng": act_data.get("lng"),
+                "lat": act_data.get("lat"),
+                "address": act_data.get("address", ""),
+                "notes": act_data.get("notes", ""),
+                "category": act_data.get("category", ""),
+                "opening_hours": act_data.get("opening_hours", ""),
+                "price": act_data.get("price"),
+                "tips": act_data.get("tips", ""),
+                "website_url": act_data.get("website_url", ""),
+                "phone": act_data.get("phone", ""),
+                "rating": act_data.get("rating"),
+                "guide_info": act_data.get("guide_info", ""),
+                "transport_info": act_data.get("transport_info", ""),
+                "opentripmap_xid": act_data.get("opentripmap_xid", ""),
+            })
 
             # Recreate photos for this activity
             for photo_data in act_data.get("photos", []):
-                photo = ActivityPhoto(
-                    id=uuid_mod.uuid4(),
-                    activity_id=new_activity_id,
-                    url=photo_data["url"],
-                    thumbnail_url=photo_data.get("thumbnail_url", ""),
-                    attribution=photo_data.get("attribution", ""),
-                    photographer_name=photo_data.get("photographer_name", ""),
-                    photographer_url=photo_data.get("photographer_url", ""),
-                    source=photo_data.get("source", "unsplash"),
-                    width=photo_data.get("width"),
-                    height=photo_data.get("height"),
-                    sort_index=photo_data.get("sort_index", 0),
-                )
-                db.add(photo)
+                photos_rows.append({
+                    "id": next(new_ids),
+                    "activity_id": new_activity_id,
+                    "url": photo_data["url"],
+                    "thumbnail_url": photo_data.get("thumbnail_url", ""),
+                    "attribution": photo_data.get("attribution", ""),
+                    "photographer_name": photo_data.get("photographer_name", ""),
+                    "photographer_url": photo_data.get("photographer_url", ""),
+                    "source": photo_data.get("source", "unsplash"),
+                    "width": photo_data.get("width"),
+                    "height": photo_data.get("height"),
+                    "sort_index": photo_data.get("sort_index", 0),
+                })
 
     # Recreate movements using sort_index -> new_stop_id map
-    for mov_data in snapshot.get("movements", []):
+    for mov_data in movements_data:
         from_stop_id = sort_index_to_stop_id.get(mov_data["from_sort_index"])
         to_stop_id = sort_index_to_stop_id.get(mov_data["to_sort_index"])
         if not from_stop_id or not to_stop_id:
             continue
 
-        from datetime import datetime as dt
-
-        movement = Movement(
-            id=uuid_mod.uuid4(),
-            trip_id=trip_id,
-            from_stop_id=from_stop_id,
-            to_stop_id=to_stop_id,
-            type=mov_data["type"],
-            duration_minutes=mov_data.get("duration_minutes"),
-            departure_time=dt.fromisoformat(mov_data["departure_time"]) if mov_data.get("departure_time") else None,
-            arrival_time=dt.fromisoformat(mov_data["arrival_time"]) if mov_data.get("arrival_time") else None,
-            carrier=mov_data.get("carrier", ""),
-            booking_ref=mov_data.get("booking_ref", ""),
-            notes=mov_data.get("notes", ""),
-            price=mov_data.get("price"),
-        )
-        db.add(movement)
+        movements_rows.append({
+            "id": next(new_ids),
+            "trip_id": trip_id,
+            "from_stop_id": from_stop_id,
+            "to_stop_id": to_stop_id,
+            "type": mov_data["type"],
+            "duration_minutes": mov_data.get("duration_minutes"),
+            "departure_time": datetime.fromisoformat(mov_data["departure_time"]) if mov_data.get("departure_time") else None,
+            "arrival_time": datetime.fromisoformat(mov_data["arrival_time"]) if mov_data.get("arrival_time") else None,
+            "carrier": mov_data.get("carrier", ""),
+            "booking_ref": mov_data.get("booking_ref", ""),
+            "notes": mov_data.get("notes", ""),
+            "price": mov_data.get("price"),
+        })
+
+    # Parents before children so foreign keys resolve
+    for model, rows in (
+        (TripStop, stops_rows),
+        (Activity, activities_rows),
+        (ActivityPhoto, photos_rows),
+        (Movement, movements_rows),
+    ):
+        if rows:
+            await db.execute(insert(model), rows)
 
     await recalculate_end_date(trip_id, db)
     await db.commit()
-    await db.refresh(version)
+    invalidate_shared_trip(trip_id)
+    # The version row itself is unchanged; refreshing it would re-download and
+    # re-decode the whole snapshot just to answer with its metadata.
     return version
 
 
@@ -321,7 +381,7 @@ async def delete_version(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    await verify_trip_ownership(trip_id, user, db)
+    await verify_trip_ownership_exists(trip_id, user, db)
 
     version = await db.get(TripVersion, version_id)
     if not version or version.trip_id != trip_id:
@@ -329,3 +389,4 @@ async def delete_version(
 
     await db.delete(version)
     await db.commit()
+    _version_cache.pop(version_id)
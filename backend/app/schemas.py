@@ -4,12 +4,21 @@ from uuid import UUID
 
 from pydantic import BaseModel, field_validator
 
-VALID_ROLES = {"admin", "designer"}
+VALID_ROLES = frozenset({"admin", "designer"})
+_INVALID_ROLE_MESSAGE = f"Role must be one of: {', '.join(sorted(VALID_ROLES))}"
+VALID_SENTIMENTS = frozenset({"like", "dislike"})
 
 
 def validate_role_value(v: str) -> str:
     if v not in VALID_ROLES:
-        raise ValueError(f"Role must be one of: {', '.join(sorted(VALID_ROLES))}")
+        raise ValueError(_INVALID_ROLE_MESSAGE)
+    return v
+
+
+def validate_org_name(v: str) -> str:
+    v = v.strip()
+    if not v or len(v) > 200:
+        raise ValueError("Organization name must be between 1 and 200 characters")
     return v
 
 
@@ -381,10 +390,7 @@ class OrganizationCreate(BaseModel):
     @field_validator("name")
     @classmethod
     def validate_name(cls, v: str) -> str:
-        v = v.strip()
-        if not v or len(v) < 1 or len(v) > 200:
-            raise ValueError("Organization name must be between 1 and 200 characters")
-        return v
+        return validate_org_name(v)
 
 
 class OrganizationUpdate(BaseModel):
@@ -393,11 +399,7 @@ class OrganizationUpdate(BaseModel):
     @field_validator("name")
     @classmethod
     def validate_name(cls, v: str | None) -> str | None:
-        if v is not None:
-            v = v.strip()
-            if not v or len(v) < 1 or len(v) > 200:
-                raise ValueError("Organization name must be between 1 and 200 characters")
-        return v
+        return None if v is None else validate_org_name(v)
 
 
 class OrganizationResponse(BaseModel):
@@ -430,7 +432,8 @@ class InviteCreate(BaseModel):
     @classmethod
     def validate_email(cls, v: str) -> str:
         v = v.strip().lower()
-        if not v or "@" not in v:
+        # One scan for "@", which must also leave a non-empty local part
+        if v.find("@") <= 0:
             raise ValueError("Invalid email address")
         if len(v) > 320:
             raise ValueError("Email address too long")
@@ -446,7 +449,8 @@ class InviteResponse(BaseModel):
     id: UUID
     email: str
     role: str
-    token: str
+    # Only set when the invite is created; the database keeps just its hash
+    token: str | None = None
     expires_at: datetime
     created_at: datetime
     accepted_at: datetime | None = None
@@ -500,16 +504,14 @@ class FeedbackCreate(BaseModel):
     @field_validator("sentiment")
     @classmethod
     def validate_sentiment(cls, v: str) -> str:
-        if v not in ["like", "dislike"]:
+        if v not in VALID_SENTIMENTS:
             raise ValueError("sentiment must be 'like' or 'dislike'")
         return v
 
     @field_validator("viewer_name")
     @classmethod
     def validate_viewer_name(cls, v: str) -> str:
-        v = v.strip()
-        if not v:
-            v = "Anonymous"
+        v = v.strip() or "Anonymous"
         if len(v) > 100:
             raise ValueError("viewer_name must be at most 100 characters")
         return v
@@ -517,7 +519,7 @@ class FeedbackCreate(BaseModel):
     @field_validator("viewer_session_id")
     @classmethod
     def validate_viewer_session_id(cls, v: str) -> str:
-        if not v or not v.strip():
+        if not v.strip():
             raise ValueError("viewer_session_id is required")
         if len(v) > 64:
             raise ValueError("viewer_session_id must be at most 64 characters")
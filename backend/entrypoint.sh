@@ -44,7 +44,7 @@ run_migrations() {
     # Check if alembic_version table exists (i.e., has Alembic ever run?)
     if alembic current 2>/dev/null | grep -q "(head)"; then
         echo -e "${GREEN}Database already at head, nothing to do.${NC}"
-    elif alembic current 2>/dev/null | grep -q "001"; then
+    elif alembic current 2>/dev/null | grep -qE "^[[:alnum:]]+"; then
         # Alembic knows about a revision, try to upgrade
         alembic upgrade head
     else
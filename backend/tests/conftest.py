@@ -8,22 +8,26 @@ Sets up:
 - Organization and invite helpers
 """
 import os
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
 from typing import AsyncGenerator
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pytest
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy import text
+from sqlalchemy import event, insert, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import aliased
 
 # Set TESTING env var before importing app
 os.environ["TESTING"] = "true"
 
 from app.auth import create_access_token, hash_password
-from app.database import get_db
+from app.cache import clear_caches
+from app.database import get_db, json_deserializer, json_serializer
 from app.main import app
 from app.models import Base, Organization, OrganizationInvite, OrganizationMember, Trip, User
+from app.token_utils import hash_token
 
 
 # Test database configuration
@@ -33,7 +37,13 @@ TEST_DATABASE_URL = os.environ.get(
 )
 
 # Create test engine and session
-test_engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+# Default QueuePool on purpose: it does not pre-ping, and reusing connections
+# keeps per-test setup off the connect/auth path (NullPool doubles suite time).
+test_engine = create_async_engine(
+    TEST_DATABASE_URL,
+    json_serializer=json_serializer,
+    json_deserializer=json_deserializer,
+)
 test_async_session = async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
 
 
@@ -45,6 +55,10 @@ async def override_get_db():
 
 app.dependency_overrides[get_db] = override_get_db
 
+# bcrypt is deliberately slow, so every fixture user shares one hash
+TEST_PASSWORD = "testpass123"
+TEST_PASSWORD_HASH = hash_password(TEST_PASSWORD)
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -67,11 +81,17 @@ async def setup_test_db():
 
 @pytest.fixture(autouse=True)
 async def clean_db():
-    """Clean all tables before each test to ensure isolation."""
+    """Clean all tables and in-process caches before each test to ensure isolation."""
     async with test_async_session() as session:
-        # Truncate in reverse FK order to avoid constraint violations
-        await session.execute(text("TRUNCATE activity_feedback, trip_versions, activity_photos, activities, movements, trip_stops, trips, organization_invites, organization_members, organizations, share_tokens, password_reset_tokens, users CASCADE"))
+        # Plain DELETEs in reverse FK order: each test leaves only a handful of
+        # rows, and TRUNCATE's per-table file swap costs far more than that.
+        # (A rolled-back outer transaction does not fit: each request gets its
+        # own session from override_get_db, which would not see uncommitted
+        # test data.)
+        for table in reversed(Base.metadata.sorted_tables):
+            await session.execute(table.delete())
         await session.commit()
+    clear_caches()
     yield
 
 
@@ -82,6 +102,38 @@ async def db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+class QueryCounter:
+    """Record SQL statements executed on the test engine."""
+
+    def __init__(self):
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@pytest.fixture
+def count_queries():
+    """Context manager counting the SQL statements issued inside its block.
+
+    Usage: ``with count_queries() as queries: ...; assert queries.count == 3``
+    """
+    @contextmanager
+    def _count_queries():
+        counter = QueryCounter()
+        event.listen(test_engine.sync_engine, "before_cursor_execute", counter)
+        try:
+            yield counter
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", counter)
+
+    return _count_queries
+
+
 @pytest.fixture
 async def client() -> AsyncGenerator[AsyncClient, None]:
     """Get an async HTTP client for API testing."""
@@ -90,43 +142,31 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
         yield ac
 
 
-@pytest.fixture
-async def user(db: AsyncSession) -> User:
-    """Create a test user."""
-    user = User(
-        email="test@example.com",
-        hashed_password=hash_password("testpass123")
+async def create_user(db: AsyncSession, email: str) -> User:
+    """Insert a user with the shared test password; RETURNING replaces a refresh."""
+    user = await db.scalar(
+        insert(User).values(email=email, hashed_password=TEST_PASSWORD_HASH).returning(User)
     )
-    db.add(user)
     await db.commit()
-    await db.refresh(user)
     return user
 
 
+@pytest.fixture
+async def user(db: AsyncSession) -> User:
+    """Create a test user."""
+    return await create_user(db, "test@example.com")
+
+
 @pytest.fixture
 async def user2(db: AsyncSession) -> User:
     """Create a second test user."""
-    user = User(
-        email="test2@example.com",
-        hashed_password=hash_password("testpass123")
-    )
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
-    return user
+    return await create_user(db, "test2@example.com")
 
 
 @pytest.fixture
 async def user3(db: AsyncSession) -> User:
     """Create a third test user."""
-    user = User(
-        email="test3@example.com",
-        hashed_password=hash_password("testpass123")
-    )
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
-    return user
+    return await create_user(db, "test3@example.com")
 
 
 @pytest.fixture
@@ -152,19 +192,23 @@ def auth_headers_user3(user3: User) -> dict:
 
 @pytest.fixture
 async def organization(db: AsyncSession, user: User) -> Organization:
-    """Create a test organization with user as admin."""
-    org = Organization(name="Test Organization", slug="test-organization")
-    db.add(org)
-    await db.flush()
-
-    member = OrganizationMember(
-        organization_id=org.id,
-        user_id=user.id,
-        role="admin"
+    """Create a test organization with user as admin.
+
+    The org row and its admin membership go in as one statement: the member
+    INSERT is a data-modifying CTE over the RETURNING of the org INSERT.
+    """
+    new_org = (
+        insert(Organization)
+        .values(id=uuid4(), name="Test Organization", slug="test-organization")
+        .returning(*Organization.__table__.c)
+        .cte("new_org")
     )
-    db.add(member)
+    new_member = insert(OrganizationMember).from_select(
+        ["id", "organization_id", "user_id", "role"],
+        select(literal(uuid4()), new_org.c.id, literal(user.id), literal("admin")),
+    ).cte("new_member")
+    org = await db.scalar(select(aliased(Organization, new_org)).add_cte(new_member))
     await db.commit()
-    await db.refresh(org)
     return org
 
 
@@ -195,7 +239,7 @@ async def invite(
         organization_id=organization.id,
         email="invitee@example.com",
         role="designer",
-        token="test-invite-token-123",
+        token_hash=hash_token("test-invite-token-123"),
         expires_at=datetime.now(timezone.utc) + timedelta(days=7)
     )
     db.add(invite)
@@ -43,16 +43,32 @@ class TestCreateOrganization:
         assert "updated_at" in data
 
         # Verify user is admin in DB
-        result = await db.execute(
-            select(OrganizationMember).where(
-                OrganizationMember.user_id == user.id
-            )
+        membership = await db.scalar(
+            select(OrganizationMember).where(OrganizationMember.user_id == user.id)
         )
-        membership = result.scalars().first()
         assert membership is not None
         assert membership.role == "admin"
         assert str(membership.organization_id) == data["id"]
 
+    async def test_create_organization_query_count(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        count_queries
+    ):
+        """Creating an org needs no reload after the inserts."""
+        with count_queries() as queries:
+            response = await client.post(
+                "/api/org",
+                json={"name": "My New Org"},
+                headers=auth_headers
+            )
+
+        assert response.status_code == 201
+        assert response.json()["created_at"] is not None
+        # user lookup + membership check + org insert + member insert
+        assert queries.count == 4
+
     async def test_create_organization_already_member(
         self,
         client: AsyncClient,
@@ -282,12 +298,10 @@ class TestDeleteOrganization:
         assert deleted_org is None
 
         # Verify membership is cascade deleted
-        result = await db.execute(
-            select(OrganizationMember).where(
-                OrganizationMember.organization_id == org_id
-            )
+        membership = await db.scalar(
+            select(OrganizationMember).where(OrganizationMember.organization_id == org_id)
         )
-        assert result.scalars().first() is None
+        assert membership is None
 
     async def test_delete_organization_as_designer(
         self,
@@ -16,6 +16,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import Organization, OrganizationInvite, OrganizationMember, User
+from app.token_utils import hash_token
 
 
 @pytest.mark.asyncio
@@ -48,7 +49,7 @@ class TestCreateInvite:
         # Verify in DB
         result = await db.execute(
             select(OrganizationInvite).where(
-                OrganizationInvite.token == data["token"]
+                OrganizationInvite.token_hash == hash_token(data["token"])
             )
         )
         invite = result.scalars().first()
@@ -200,7 +201,23 @@ class TestListInvites:
         invites = response.json()
         assert len(invites) == 1
         assert invites[0]["email"] == invite.email
-        assert invites[0]["token"] == invite.token
+        # Only the hash is stored, so listed invites carry no token
+        assert invites[0]["token"] is None
+
+    async def test_list_invites_single_query(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        invite: OrganizationInvite,
+        count_queries
+    ):
+        """Listing invites is one query on top of auth."""
+        with count_queries() as queries:
+            response = await client.get("/api/org/invites", headers=auth_headers)
+
+        assert len(response.json()) == 1
+        # user lookup + membership lookup + the invite list itself
+        assert queries.count == 3
 
     async def test_list_invites_excludes_expired(
         self,
@@ -215,7 +232,7 @@ class TestListInvites:
             organization_id=organization.id,
             email="expired@example.com",
             role="designer",
-            token="expired-token",
+            token_hash=hash_token("expired-token"),
             expires_at=datetime.now(timezone.utc) - timedelta(days=1)
         )
         db.add(expired_invite)
@@ -240,7 +257,7 @@ class TestListInvites:
             organization_id=organization.id,
             email="accepted@example.com",
             role="designer",
-            token="accepted-token",
+            token_hash=hash_token("accepted-token"),
             expires_at=datetime.now(timezone.utc) + timedelta(days=7),
             accepted_at=datetime.now(timezone.utc)
         )
@@ -266,7 +283,7 @@ class TestListInvites:
             organization_id=organization.id,
             email="first@example.com",
             role="designer",
-            token="token1",
+            token_hash=hash_token("token1"),
             expires_at=datetime.now(timezone.utc) + timedelta(days=7)
         )
         db.add(invite1)
@@ -276,7 +293,7 @@ class TestListInvites:
             organization_id=organization.id,
             email="second@example.com",
             role="designer",
-            token="token2",
+            token_hash=hash_token("token2"),
             expires_at=datetime.now(timezone.utc) + timedelta(days=7)
         )
         db.add(invite2)
@@ -384,7 +401,7 @@ class TestRevokeInvite:
             organization_id=other_org.id,
             email="other@example.com",
             role="designer",
-            token="other-token",
+            token_hash=hash_token("other-token"),
             expires_at=datetime.now(timezone.utc) + timedelta(days=7)
         )
         db.add(other_invite)
@@ -398,6 +415,85 @@ class TestRevokeInvite:
         assert response.status_code == 404
 
 
+@pytest.mark.asyncio
+class TestInviteInfo:
+    """Test GET /api/org/invites/{token}/info - public invite landing page."""
+
+    async def test_invite_info(
+        self,
+        client: AsyncClient,
+        invite: OrganizationInvite,
+        count_queries
+    ):
+        """Invite info is public and served from cache on repeat hits."""
+        with count_queries() as queries:
+            response = await client.get("/api/org/invites/test-invite-token-123/info")
+
+        # Invite and organization are loaded together
+        assert queries.count == 1
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "org_name": "Test Organization",
+            "role": "designer",
+            "email": "invitee@example.com",
+        }
+
+        with count_queries() as queries:
+            response = await client.get("/api/org/invites/test-invite-token-123/info")
+
+        assert response.status_code == 200
+        assert queries.count == 0
+
+    async def test_invite_info_after_revoke(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        invite: OrganizationInvite
+    ):
+        """Revoking an invite evicts its cached info."""
+        response = await client.get("/api/org/invites/test-invite-token-123/info")
+        assert response.status_code == 200
+
+        response = await client.delete(f"/api/org/invites/{invite.id}", headers=auth_headers)
+        assert response.status_code == 204
+
+        response = await client.get("/api/org/invites/test-invite-token-123/info")
+        assert response.status_code == 404
+
+    async def test_invite_info_after_org_renamed(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        invite: OrganizationInvite
+    ):
+        """Renaming the organization evicts its invites' cached info."""
+        response = await client.get("/api/org/invites/test-invite-token-123/info")
+        assert response.json()["org_name"] == "Test Organization"
+
+        response = await client.put("/api/org", json={"name": "Renamed Org"}, headers=auth_headers)
+        assert response.status_code == 200
+
+        response = await client.get("/api/org/invites/test-invite-token-123/info")
+        assert response.json()["org_name"] == "Renamed Org"
+
+    async def test_invite_info_after_org_deleted(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        invite: OrganizationInvite
+    ):
+        """Deleting the organization evicts its invites' cached info."""
+        response = await client.get("/api/org/invites/test-invite-token-123/info")
+        assert response.status_code == 200
+
+        response = await client.delete("/api/org", headers=auth_headers)
+        assert response.status_code == 204
+
+        response = await client.get("/api/org/invites/test-invite-token-123/info")
+        assert response.status_code == 404
+
+
 @pytest.mark.asyncio
 class TestAcceptInvite:
     """Test POST /api/org/invites/{token}/accept - accepting invites."""
@@ -416,14 +512,14 @@ class TestAcceptInvite:
             organization_id=organization.id,
             email=user2.email,
             role="designer",
-            token="test-token-123",
+            token_hash=hash_token("test-token-123"),
             expires_at=datetime.now(timezone.utc) + timedelta(days=7)
         )
         db.add(invite)
         await db.commit()
 
         response = await client.post(
-            f"/api/org/invites/{invite.token}/accept",
+            "/api/org/invites/test-token-123/accept",
             headers=auth_headers_user2
         )
 
@@ -460,14 +556,14 @@ class TestAcceptInvite:
             organization_id=organization.id,
             email=user2.email,
             role="admin",
-            token="admin-token",
+            token_hash=hash_token("admin-token"),
             expires_at=datetime.now(timezone.utc) + timedelta(days=7)
         )
         db.add(invite)
         await db.commit()
 
         response = await client.post(
-            f"/api/org/invites/{invite.token}/accept",
+            "/api/org/invites/admin-token/accept",
             headers=auth_headers_user2
         )
 
@@ -495,14 +591,14 @@ class TestAcceptInvite:
             organization_id=organization.id,
             email=user2.email,
             role="designer",
-            token="expired-token",
+            token_hash=hash_token("expired-token"),
             expires_at=datetime.now(timezone.utc) - timedelta(days=1)
         )
         db.add(invite)
         await db.commit()
 
         response = await client.post(
-            f"/api/org/invites/{invite.token}/accept",
+            "/api/org/invites/expired-token/accept",
             headers=auth_headers_user2
         )
 
@@ -522,7 +618,7 @@ class TestAcceptInvite:
             organization_id=organization.id,
             email=user2.email,
             role="designer",
-            token="used-token",
+            token_hash=hash_token("used-token"),
             expires_at=datetime.now(timezone.utc) + timedelta(days=7),
             accepted_at=datetime.now(timezone.utc)
         )
@@ -530,7 +626,7 @@ class TestAcceptInvite:
         await db.commit()
 
         response = await client.post(
-            f"/api/org/invites/{invite.token}/accept",
+            "/api/org/invites/used-token/accept",
             headers=auth_headers_user2
         )
 
@@ -550,14 +646,14 @@ class TestAcceptInvite:
             organization_id=organization.id,
             email="different@example.com",
             role="designer",
-            token="wrong-email-token",
+            token_hash=hash_token("wrong-email-token"),
             expires_at=datetime.now(timezone.utc) + timedelta(days=7)
         )
         db.add(invite)
         await db.commit()
 
         response = await client.post(
-            f"/api/org/invites/{invite.token}/accept",
+            "/api/org/invites/wrong-email-token/accept",
             headers=auth_headers_user2
         )
 
@@ -578,14 +674,14 @@ class TestAcceptInvite:
             organization_id=organization.id,
             email=user2.email.upper(),
             role="designer",
-            token="case-token",
+            token_hash=hash_token("case-token"),
             expires_at=datetime.now(timezone.utc) + timedelta(days=7)
         )
         db.add(invite)
         await db.commit()
 
         response = await client.post(
-            f"/api/org/invites/{invite.token}/accept",
+            "/api/org/invites/case-token/accept",
             headers=auth_headers_user2
         )
 
@@ -605,20 +701,49 @@ class TestAcceptInvite:
             organization_id=organization.id,
             email=user.email,
             role="designer",
-            token="redundant-token",
+            token_hash=hash_token("redundant-token"),
             expires_at=datetime.now(timezone.utc) + timedelta(days=7)
         )
         db.add(invite)
         await db.commit()
 
         response = await client.post(
-            f"/api/org/invites/{invite.token}/accept",
+            "/api/org/invites/redundant-token/accept",
             headers=auth_headers
         )
 
         assert response.status_code == 409
         assert "already a member" in response.json()["detail"].lower()
 
+    async def test_accept_invite_query_budget(
+        self,
+        client: AsyncClient,
+        auth_headers_user2: dict,
+        organization: Organization,
+        db: AsyncSession,
+        count_queries
+    ):
+        """Accepting an invite runs a fixed, small number of queries."""
+        invite = OrganizationInvite(
+            organization_id=organization.id,
+            email="test2@example.com",
+            role="designer",
+            token_hash=hash_token("budget-token"),
+            expires_at=datetime.now(timezone.utc) + timedelta(days=7)
+        )
+        db.add(invite)
+        await db.commit()
+
+        with count_queries() as queries:
+            response = await client.post(
+                "/api/org/invites/budget-token/accept",
+                headers=auth_headers_user2
+            )
+
+        assert response.status_code == 200
+        # user, membership check, invite, update + insert, org with member count
+        assert queries.count == 6
+
     async def test_accept_invite_nonexistent_token(
         self,
         client: AsyncClient,
@@ -639,7 +764,7 @@ class TestAcceptInvite:
     ):
         """Cannot accept invite without authentication."""
         response = await client.post(
-            f"/api/org/invites/{invite.token}/accept"
+            "/api/org/invites/test-invite-token-123/accept"
         )
 
         assert response.status_code == 401
@@ -84,6 +84,24 @@ class TestListMembers:
         assert members[0]["email"] == "test@example.com"
         assert members[1]["email"] == "test2@example.com"
 
+    async def test_list_members_single_query(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip,
+        trip_user2,
+        organization_with_designer: Organization,
+        count_queries
+    ):
+        """Member list with trip counts is one query regardless of org size."""
+        with count_queries() as queries:
+            response = await client.get("/api/org/members", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert len(response.json()) == 2
+        # user lookup + membership lookup + the member list itself
+        assert queries.count == 3
+
     async def test_list_members_not_member(
         self,
         client: AsyncClient,
@@ -6,6 +6,7 @@ Covers:
 - Admin sees all org trips via GET /api/org/trips
 - GET /api/auth/me returns org info
 - Organization stats endpoint
+- Trip budget totals computed in SQL
 """
 from datetime import datetime
 
@@ -13,7 +14,7 @@ import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Organization, Trip, User
+from app.models import Activity, Movement, Organization, Trip, TripStop, User
 
 
 @pytest.mark.asyncio
@@ -122,6 +123,23 @@ class TestListOrgTrips:
         assert trips[0]["name"] == "User2 Trip to Spain"
         assert trips[1]["name"] == "Test Trip to France"
 
+    async def test_list_org_trips_query_budget(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip,
+        trip_user2,
+        organization_with_designer: Organization,
+        count_queries
+    ):
+        """Trip list stays one query however many trips and designers there are."""
+        with count_queries() as queries:
+            response = await client.get("/api/org/trips", headers=auth_headers)
+
+        assert len(response.json()) == 2
+        # user lookup + membership lookup + the trip list itself
+        assert queries.count == 3
+
     async def test_list_org_trips_as_designer(
         self,
         client: AsyncClient,
@@ -331,6 +349,62 @@ class TestOrgStats:
         assert trips_by_designer[1]["email"] == "test2@example.com"
         assert trips_by_designer[1]["count"] == 1
 
+    async def test_get_org_stats_query_budget(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip,
+        trip_user2,
+        organization_with_designer: Organization,
+        count_queries
+    ):
+        """Uncached stats cost a fixed number of aggregate queries."""
+        with count_queries() as queries:
+            response = await client.get("/api/org/stats", headers=auth_headers)
+
+        assert response.status_code == 200
+        # user + membership, then totals, members, by designer, by status
+        assert queries.count == 6
+
+    async def test_get_org_stats_cached(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip,
+        count_queries
+    ):
+        """Repeated stats requests are served from cache."""
+        first = await client.get("/api/org/stats", headers=auth_headers)
+        assert first.status_code == 200
+
+        with count_queries() as queries:
+            second = await client.get("/api/org/stats", headers=auth_headers)
+
+        assert second.json() == first.json()
+        # Only the user and membership lookups hit the database
+        assert queries.count == 2
+
+    async def test_get_org_stats_refreshed_after_trip_created(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        organization: Organization
+    ):
+        """Creating a trip invalidates the cached stats."""
+        response = await client.get("/api/org/stats", headers=auth_headers)
+        assert response.json()["total_trips"] == 0
+
+        response = await client.post(
+            "/api/trips",
+            json={"name": "Italy", "country_code": "IT", "start_date": "2026-06-01"},
+            headers=auth_headers
+        )
+        assert response.status_code == 201
+
+        response = await client.get("/api/org/stats", headers=auth_headers)
+        assert response.json()["total_trips"] == 1
+        assert response.json()["trips_by_status"] == {"planning": 1}
+
     async def test_get_org_stats_not_member(
         self,
         client: AsyncClient,
@@ -340,3 +414,82 @@ class TestOrgStats:
         response = await client.get("/api/org/stats", headers=auth_headers_user2)
 
         assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+class TestTripBudget:
+    """Test GET /api/trips/{id}/budget"""
+
+    async def test_budget_matches_itinerary(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip,
+        db: AsyncSession
+    ):
+        """Aggregated totals match the budget computed from the loaded itinerary."""
+        paris = TripStop(trip_id=trip.id, sort_index=0, name="Paris", lng=2.35, lat=48.85, nights=2, price_per_night=120)
+        lyon = TripStop(trip_id=trip.id, sort_index=1, name="Lyon", lng=4.83, lat=45.76, nights=1)
+        db.add_all([paris, lyon])
+        await db.flush()
+        db.add_all([
+            Activity(trip_stop_id=paris.id, sort_index=0, title="Louvre", price=22),
+            Activity(trip_stop_id=paris.id, sort_index=1, title="Walk"),
+            Activity(trip_stop_id=lyon.id, sort_index=0, title="Food tour", price=65.5),
+            Movement(trip_id=trip.id, from_stop_id=paris.id, to_stop_id=lyon.id, type="train", price=49.9),
+        ])
+        await db.commit()
+
+        response = await client.get(f"/api/trips/{trip.id}/budget", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "activities_total": 87.5,
+            "accommodation_total": 240.0,
+            "transport_total": 49.9,
+            "grand_total": 377.4,
+        }
+        itinerary = await client.get(f"/api/trips/{trip.id}/itinerary", headers=auth_headers)
+        assert itinerary.json()["budget"] == response.json()
+
+    async def test_budget_empty_trip(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip,
+        count_queries
+    ):
+        """A trip with no stops has a zero budget, summed in a single statement."""
+        with count_queries() as queries:
+            response = await client.get(f"/api/trips/{trip.id}/budget", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["grand_total"] == 0.0
+        # user lookup + trip ownership + the aggregate itself
+        assert queries.count == 3
+
+    async def test_budget_other_users_trip(
+        self,
+        client: AsyncClient,
+        auth_headers_user2: dict,
+        trip: Trip
+    ):
+        """Budget of another user's trip is not visible."""
+        response = await client.get(f"/api/trips/{trip.id}/budget", headers=auth_headers_user2)
+
+        assert response.status_code == 404
+
+    async def test_foreign_itinerary_not_loaded(
+        self,
+        client: AsyncClient,
+        auth_headers_user2: dict,
+        trip: Trip,
+        count_queries
+    ):
+        """Another user's itinerary is a 404 that never reads past the trip row."""
+        with count_queries() as queries:
+            response = await client.get(f"/api/trips/{trip.id}/itinerary", headers=auth_headers_user2)
+
+        assert response.status_code == 404
+        # user lookup + trip ownership; no stop, movement or activity queries
+        assert queries.count == 2
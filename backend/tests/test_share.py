@@ -0,0 +1,113 @@
+"""
+Test public shared-trip links.
+
+Covers:
+- GET /api/shared/{token} serves the itinerary with an ETag
+- If-None-Match short-circuits to 304
+- Cached views are dropped when the itinerary changes or the link is revoked
+- A view rendered across an invalidation is served but not cached
+"""
+import pytest
+from httpx import AsyncClient
+
+from app.dependencies import invalidate_shared_trip
+from app.models import Trip
+from app.routers import share
+
+
+@pytest.mark.asyncio
+class TestSharedTrip:
+    """Test GET /api/shared/{token}"""
+
+    async def _share(self, client: AsyncClient, trip: Trip, headers: dict) -> str:
+        response = await client.post(f"/api/trips/{trip.id}/share", headers=headers)
+        assert response.status_code == 201
+        return response.json()["token"]
+
+    async def test_shared_trip_etag_not_modified(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip,
+        count_queries
+    ):
+        """Repeat viewers get a 304 from cache without touching the database."""
+        token = await self._share(client, trip, auth_headers)
+
+        response = await client.get(f"/api/shared/{token}")
+        assert response.status_code == 200
+        assert response.json()["trip_name"] == "Test Trip to France"
+        etag = response.headers["etag"]
+
+        with count_queries() as queries:
+            response = await client.get(f"/api/shared/{token}", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert queries.count == 0
+
+    async def test_shared_trip_refreshed_after_stop_added(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip
+    ):
+        """Editing the itinerary drops the cached view and changes the ETag."""
+        token = await self._share(client, trip, auth_headers)
+        first = await client.get(f"/api/shared/{token}")
+        assert first.json()["stops"] == []
+
+        response = await client.post(
+            f"/api/trips/{trip.id}/stops",
+            json={"name": "Paris", "lng": 2.35, "lat": 48.85},
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+
+        second = await client.get(f"/api/shared/{token}", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 200
+        assert [s["stop"]["name"] for s in second.json()["stops"]] == ["Paris"]
+        assert second.headers["etag"] != first.headers["etag"]
+
+    async def test_shared_trip_revoked(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip
+    ):
+        """A revoked link stops working even while its view is cached."""
+        token = await self._share(client, trip, auth_headers)
+        assert (await client.get(f"/api/shared/{token}")).status_code == 200
+
+        response = await client.delete(f"/api/trips/{trip.id}/share", headers=auth_headers)
+        assert response.status_code == 204
+
+        response = await client.get(f"/api/shared/{token}")
+        assert response.status_code == 404
+
+    async def test_shared_trip_not_cached_across_invalidation(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip,
+        monkeypatch,
+        count_queries
+    ):
+        """A render that overlaps an edit does not store its possibly stale view."""
+        token = await self._share(client, trip, auth_headers)
+        load_itinerary = share.load_itinerary
+
+        async def load_itinerary_during_edit(trip_id, db):
+            # An edit commits and invalidates while this render is still reading
+            invalidate_shared_trip(trip_id)
+            return await load_itinerary(trip_id, db)
+
+        monkeypatch.setattr(share, "load_itinerary", load_itinerary_during_edit)
+        assert (await client.get(f"/api/shared/{token}")).status_code == 200
+        monkeypatch.undo()
+
+        with count_queries() as queries:
+            response = await client.get(f"/api/shared/{token}")
+
+        assert response.status_code == 200
+        assert queries.count > 0
@@ -0,0 +1,157 @@
+"""
+Test trip version snapshots.
+
+Covers:
+- POST /api/trips/{id}/versions snapshots stops, activities, photos and movements
+- POST /api/trips/{id}/versions/{version_id}/restore rebuilds the itinerary from it
+"""
+from datetime import date, datetime, time, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Activity, ActivityPhoto, Movement, Trip, TripStop
+
+
+@pytest.mark.asyncio
+class TestTripVersions:
+    """Test version snapshot and restore"""
+
+    async def _seed(self, db: AsyncSession, trip: Trip):
+        rome = TripStop(trip_id=trip.id, sort_index=0, name="Rome", lng=12.5, lat=41.9, price_per_night=80.5)
+        florence = TripStop(trip_id=trip.id, sort_index=1, name="Florence", lng=11.2, lat=43.8)
+        db.add_all([rome, florence])
+        await db.flush()
+        activity = Activity(
+            trip_stop_id=rome.id,
+            sort_index=0,
+            title="Colosseum",
+            date=date(2026, 6, 1),
+            start_time=time(9, 30),
+            price=16,
+        )
+        db.add(activity)
+        await db.flush()
+        db.add_all([
+            ActivityPhoto(activity_id=activity.id, url="https://img/2", sort_index=1),
+            ActivityPhoto(activity_id=activity.id, url="https://img/1", sort_index=0),
+            Movement(
+                trip_id=trip.id,
+                from_stop_id=rome.id,
+                to_stop_id=florence.id,
+                type="train",
+                departure_time=datetime(2026, 6, 3, 10, 5, tzinfo=timezone.utc),
+                price=45,
+            ),
+        ])
+        await db.commit()
+
+    async def test_create_version_snapshots_itinerary(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip,
+        db: AsyncSession
+    ):
+        """The snapshot holds the full itinerary, ordered by sort_index."""
+        await self._seed(db, trip)
+
+        response = await client.post(f"/api/trips/{trip.id}/versions", json={"label": "Draft"}, headers=auth_headers)
+        assert response.status_code == 201
+        assert response.json()["version_number"] == 1
+        version_id = response.json()["id"]
+
+        response = await client.get(f"/api/trips/{trip.id}/versions/{version_id}", headers=auth_headers)
+        assert response.status_code == 200
+        snapshot = response.json()["snapshot_data"]
+
+        assert [s["name"] for s in snapshot["stops"]] == ["Rome", "Florence"]
+        assert snapshot["stops"][0]["price_per_night"] == 80.5
+        activity = snapshot["stops"][0]["activities"][0]
+        assert activity["date"] == "2026-06-01"
+        assert activity["start_time"] == "09:30:00"
+        assert [p["url"] for p in activity["photos"]] == ["https://img/1", "https://img/2"]
+        assert snapshot["stops"][1]["activities"] == []
+        [movement] = snapshot["movements"]
+        assert (movement["from_sort_index"], movement["to_sort_index"]) == (0, 1)
+        assert datetime.fromisoformat(movement["departure_time"]) == datetime(2026, 6, 3, 10, 5, tzinfo=timezone.utc)
+
+    async def test_restore_version_rebuilds_itinerary(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip,
+        db: AsyncSession
+    ):
+        """Restoring brings back deleted stops with their activities, photos and movements."""
+        await self._seed(db, trip)
+        response = await client.post(f"/api/trips/{trip.id}/versions", json={"label": "Draft"}, headers=auth_headers)
+        version_id = response.json()["id"]
+
+        stops = (await client.get(f"/api/trips/{trip.id}/stops", headers=auth_headers)).json()
+        response = await client.delete(f"/api/stops/{stops[0]['id']}", headers=auth_headers)
+        assert response.status_code == 204
+
+        itinerary = (await client.get(f"/api/trips/{trip.id}/itinerary", headers=auth_headers)).json()
+        [florence] = itinerary["stops"]
+        assert florence["stop"]["name"] == "Florence"
+        assert florence["movement_to_next"] is None
+
+        response = await client.post(f"/api/trips/{trip.id}/versions/{version_id}/restore", headers=auth_headers)
+        assert response.status_code == 200
+
+        itinerary = (await client.get(f"/api/trips/{trip.id}/itinerary", headers=auth_headers)).json()
+        assert [s["stop"]["name"] for s in itinerary["stops"]] == ["Rome", "Florence"]
+        rome = itinerary["stops"][0]
+        assert [p["url"] for p in rome["activities"][0]["photos"]] == ["https://img/1", "https://img/2"]
+        assert rome["movement_to_next"]["to_stop_id"] == itinerary["stops"][1]["stop"]["id"]
+        assert itinerary["budget"]["grand_total"] == 80.5 + 16 + 45
+
+    async def test_version_detail_cached_until_deleted(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip,
+        count_queries
+    ):
+        """Repeat reads skip the version row; deleting the version evicts it."""
+        response = await client.post(f"/api/trips/{trip.id}/versions", json={"label": "Draft"}, headers=auth_headers)
+        version_url = f"/api/trips/{trip.id}/versions/{response.json()['id']}"
+        first = await client.get(version_url, headers=auth_headers)
+        assert first.status_code == 200
+
+        with count_queries() as queries:
+            second = await client.get(version_url, headers=auth_headers)
+        assert second.json() == first.json()
+        # User lookup and trip ownership only
+        assert queries.count == 2
+
+        response = await client.delete(version_url, headers=auth_headers)
+        assert response.status_code == 204
+        response = await client.get(version_url, headers=auth_headers)
+        assert response.status_code == 404
+
+    async def test_create_version_skips_unchanged_duplicate(
+        self,
+        client: AsyncClient,
+        auth_headers: dict,
+        trip: Trip,
+        db: AsyncSession
+    ):
+        """Re-saving the same label over an unchanged trip returns the existing version."""
+        await self._seed(db, trip)
+        url = f"/api/trips/{trip.id}/versions"
+
+        first = await client.post(url, json={"label": "Draft"}, headers=auth_headers)
+        assert first.status_code == 201
+        repeat = await client.post(url, json={"label": "Draft"}, headers=auth_headers)
+        assert repeat.status_code == 200
+        assert repeat.json() == first.json()
+
+        renamed = await client.post(url, json={"label": "Final"}, headers=auth_headers)
+        assert renamed.status_code == 201
+        assert renamed.json()["version_number"] == 2
+
+        versions = (await client.get(url, headers=auth_headers)).json()
+        assert [v["label"] for v in versions] == ["Final", "Draft"]
@@ -2,7 +2,7 @@
 --
 -- Changelog vs v3:
 --   • NUMERIC(12,2) for all money columns (was DOUBLE PRECISION / FLOAT)
---   • SHA-256 hashed email-verification & password-reset tokens
+--   • SHA-256 hashed email-verification, password-reset & org invite tokens
 --   • CHECK constraints on trips.status, movements.type, trips.currency
 --   • Removed UNIQUE(from_stop_id, to_stop_id) on movements (round-trips)
 --   • Feedback gets direct trip_id FK; share_token_id nullable + SET NULL
@@ -27,6 +27,8 @@ CREATE TABLE users (
   created_at                  TIMESTAMPTZ   NOT NULL DEFAULT NOW()
 );
 
+CREATE INDEX idx_users_email_lower ON users (lower(email));
+
 -- ============================================================================
 -- organizations
 -- ============================================================================
@@ -53,6 +55,8 @@ CREATE TABLE organization_members (
 );
 
 CREATE INDEX idx_org_members_user_id ON organization_members (user_id);
+CREATE INDEX idx_org_members_org_created ON organization_members (organization_id, created_at);
+CREATE INDEX idx_org_members_org_admins ON organization_members (organization_id) WHERE role = 'admin';
 
 -- ============================================================================
 -- organization_invites
@@ -63,13 +67,13 @@ CREATE TABLE organization_invites (
   organization_id   UUID          NOT NULL REFERENCES organizations(id) ON DELETE CASCADE,
   email             VARCHAR(320)  NOT NULL,
   role              VARCHAR(20)   NOT NULL DEFAULT 'designer',
-  token             VARCHAR(64)   NOT NULL UNIQUE,
+  token_hash        VARCHAR(128)  NOT NULL UNIQUE,
   expires_at        TIMESTAMPTZ   NOT NULL,
   accepted_at       TIMESTAMPTZ,
   created_at        TIMESTAMPTZ   NOT NULL DEFAULT NOW()
 );
 
-CREATE INDEX idx_org_invites_token ON organization_invites (token);
+CREATE INDEX idx_org_invites_org_pending ON organization_invites (organization_id) WHERE accepted_at IS NULL;
 
 -- ============================================================================
 -- trips
@@ -96,7 +100,8 @@ CREATE TABLE trips (
 );
 
 CREATE INDEX idx_trips_user_created ON trips (user_id, created_at DESC);
-CREATE INDEX idx_trips_organization_id ON trips (organization_id);
+CREATE INDEX idx_trips_org_created ON trips (organization_id, created_at DESC);
+CREATE INDEX idx_trips_org_user ON trips (organization_id, user_id);
 CREATE INDEX idx_trips_country_code ON trips (country_code);
 
 -- ============================================================================
@@ -120,8 +125,6 @@ CREATE TABLE trip_stops (
   CONSTRAINT uq_trip_stop_sort UNIQUE (trip_id, sort_index) DEFERRABLE INITIALLY DEFERRED
 );
 
-CREATE INDEX idx_trip_stops_trip_id ON trip_stops (trip_id);
-
 -- ============================================================================
 -- movements
 -- ============================================================================
@@ -184,8 +187,6 @@ CREATE TABLE activities (
   CONSTRAINT uq_activity_sort UNIQUE (trip_stop_id, sort_index) DEFERRABLE INITIALLY DEFERRED
 );
 
-CREATE INDEX idx_activities_trip_stop_id ON activities (trip_stop_id);
-
 -- ============================================================================
 -- activity_photos
 -- ============================================================================
@@ -208,8 +209,6 @@ CREATE TABLE activity_photos (
     DEFERRABLE INITIALLY DEFERRED
 );
 
-CREATE INDEX idx_activity_photos_activity_id ON activity_photos (activity_id);
-
 -- ============================================================================
 -- share_tokens
 -- ============================================================================
@@ -223,8 +222,9 @@ CREATE TABLE share_tokens (
   created_at  TIMESTAMPTZ   NOT NULL DEFAULT NOW()
 );
 
-CREATE INDEX idx_share_tokens_token   ON share_tokens (token);
+CREATE INDEX idx_share_tokens_token   ON share_tokens (token) INCLUDE (trip_id, expires_at);
 CREATE INDEX idx_share_tokens_trip_id ON share_tokens (trip_id);
+CREATE INDEX idx_share_tokens_expires_at ON share_tokens (expires_at);
 
 -- ============================================================================
 -- password_reset_tokens
@@ -256,6 +256,9 @@ CREATE TABLE trip_versions (
   CONSTRAINT uq_trip_versions_trip_version UNIQUE (trip_id, version_number)
 );
 
+-- Snapshots are always read whole; keep them out of line but uncompressed
+ALTER TABLE trip_versions ALTER COLUMN snapshot_data SET STORAGE EXTERNAL;
+
 CREATE INDEX idx_trip_versions_trip_id ON trip_versions (trip_id);
 
 -- ============================================================================